@@ -0,0 +1,29 @@
+-- Add-and-Log Migration
+-- Add this to Supabase SQL Editor so typing a custom product or trigger
+-- saves its definition and logs it in one round-trip (and one transaction).
+
+CREATE OR REPLACE FUNCTION public.add_and_log_product(
+  p_user_id  uuid,
+  p_name     text
+)
+RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO public.products (user_id, name, is_global)
+  VALUES (p_user_id, p_name, FALSE);
+  INSERT INTO public.product_logs (user_id, product_name, logged_at)
+  VALUES (p_user_id, p_name, NOW());
+$$;
+
+CREATE OR REPLACE FUNCTION public.add_and_log_trigger(
+  p_user_id  uuid,
+  p_name     text
+)
+RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO public.triggers (user_id, name, is_global)
+  VALUES (p_user_id, p_name, FALSE);
+  INSERT INTO public.trigger_logs (user_id, trigger_name, logged_at)
+  VALUES (p_user_id, p_name, NOW());
+$$;
@@ -38,11 +38,16 @@ class TimelineResponse(BaseModel):
 # Router setup
 router = APIRouter(prefix="/api/v1/timeline", tags=["timeline"])
 
+_database: Optional[Database] = None
+
 async def get_database() -> Database:
-    """Database dependency."""
-    db = Database()
-    await db.initialize()
-    return db
+    """Database dependency, initialised once and shared across requests."""
+    global _database
+    if _database is None:
+        db = Database()
+        await db.initialize()
+        _database = db
+    return _database
 
 async def get_user_from_telegram_id(telegram_id: int, db: Database) -> Dict[str, Any]:
     """Get user record from telegram ID."""
@@ -107,7 +112,7 @@ async def get_timeline_events(
         
         # Get symptoms
         try:
-            symptoms_response = db.client.table('symptom_logs').select('*').eq('user_id', str(user_uuid)).execute()
+            symptoms_response = await db.run(db.client.table('symptom_logs').select('*').eq('user_id', str(user_uuid)).execute)
             for s in symptoms_response.data:
                 event_time = parse_timestamp_safe(s.get('logged_at'))
                 if event_time and from_date <= event_time <= to_date:
@@ -127,7 +132,7 @@ async def get_timeline_events(
         
         # Get products
         try:
-            products_response = db.client.table('product_logs').select('*').eq('user_id', str(user_uuid)).execute()
+            products_response = await db.run(db.client.table('product_logs').select('*').eq('user_id', str(user_uuid)).execute)
             for p in products_response.data:
                 event_time = parse_timestamp_safe(p.get('logged_at'))
                 if event_time and from_date <= event_time <= to_date:
@@ -145,7 +150,7 @@ async def get_timeline_events(
         
         # Get triggers
         try:
-            triggers_response = db.client.table('trigger_logs').select('*').eq('user_id', str(user_uuid)).execute()
+            triggers_response = await db.run(db.client.table('trigger_logs').select('*').eq('user_id', str(user_uuid)).execute)
             for t in triggers_response.data:
                 event_time = parse_timestamp_safe(t.get('logged_at'))
                 if event_time and from_date <= event_time <= to_date:
@@ -215,8 +220,8 @@ async def get_trigger_insights(
         user_uuid = UUID(user['id'])
         
         # Get all triggers and symptoms for this user
-        triggers_response = db.client.table('trigger_logs').select('*').eq('user_id', str(user_uuid)).execute()
-        symptoms_response = db.client.table('symptom_logs').select('*').eq('user_id', str(user_uuid)).execute()
+        triggers_response = await db.run(db.client.table('trigger_logs').select('*').eq('user_id', str(user_uuid)).execute)
+        symptoms_response = await db.run(db.client.table('symptom_logs').select('*').eq('user_id', str(user_uuid)).execute)
         
         if not triggers_response.data or not symptoms_response.data:
             return []
@@ -301,8 +306,8 @@ async def get_product_insights(
         user_uuid = UUID(user['id'])
         
         # Get all product logs and symptoms for this user
-        products_response = db.client.table('product_logs').select('*').eq('user_id', str(user_uuid)).execute()
-        symptoms_response = db.client.table('symptom_logs').select('*').eq('user_id', str(user_uuid)).execute()
+        products_response = await db.run(db.client.table('product_logs').select('*').eq('user_id', str(user_uuid)).execute)
+        symptoms_response = await db.run(db.client.table('symptom_logs').select('*').eq('user_id', str(user_uuid)).execute)
         
         if not products_response.data:
             return []
@@ -1,23 +1,44 @@
 import os
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import functools
+import multiprocessing
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+from typing import Callable, Dict, List, Optional, Tuple
 import json
-import traceback
+import re
+import string
+import tempfile
 import time
+import warnings
+from dataclasses import dataclass
 
+import httpx
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Bot, BotCommand
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from telegram.constants import ParseMode, ChatAction
-from telegram.error import RetryAfter, BadRequest
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand, WebAppInfo
+from telegram.ext import (
+    Application,
+    CallbackQueryHandler,
+    CommandHandler,
+    ConversationHandler,
+    MessageHandler,
+    PersistenceInput,
+    PicklePersistence,
+    filters,
+)
+from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
+from telegram.warnings import PTBUserWarning
 
 from database import Database
 from openai_service import OpenAIService
 from reminder_scheduler import ReminderScheduler
-# from analysis_providers.insightface_provider import InsightFaceProvider
-from skin_analysis import process_skin_image
+from services.message_queue import EditOutbox
+from utils.notes import parse_note
+from skin_analysis import run_skin_analysis
 from skin_kpi_analyzer import SkinKPIAnalyzer
 
 # Load environment variables from .env file
@@ -25,53 +46,732 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on the in-memory set of known Telegram users
+KNOWN_USERS_MAX = 100_000
+
+# Maximum number of Telegram updates processed concurrently
+MAX_CONCURRENT_UPDATES = 32
+
+# Updates waiting for a worker before new ones are dropped
+UPDATE_QUEUE_MAX = 1000
+
+# Seconds shutdown waits for queued work to finish before cancelling it,
+# so one hung handler can't hold up process exit
+SHUTDOWN_DRAIN_TIMEOUT = 10.0
+
+# Concurrent webhook connections Telegram may open (its maximum is 100),
+# and the only update types the handlers use
+WEBHOOK_MAX_CONNECTIONS = 100
+WEBHOOK_UPDATES = (Update.MESSAGE, Update.EDITED_MESSAGE, Update.CALLBACK_QUERY)
+
+# Outbound message edits are sharded by chat over this many sender tasks,
+# which keeps edits to one chat in order; the total backlog is bounded.
+SENDER_COUNT = 8
+OUTBOX_MAX = 10_000
+# Seconds during which further edits to a multi-select keyboard are collapsed
+# into one; Telegram allows roughly one edit per second per chat.
+TOGGLE_EDIT_DELAY = 0.25
+
+# Processes running photo analysis, which is CPU bound and holds the GIL,
+# and the photos that may wait for one before analysis is skipped
+ANALYSIS_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+PHOTO_QUEUE_MAX = 32
+
+# Valid symptom severity reply (surrounding whitespace allowed)
+_SEVERITY_RE = re.compile(r"^\s*[1-5]\s*$")
+
+# Static /start and /help copy
+WELCOME_TEMPLATE = """🌟 *Welcome to SkinTrack, {name}!*
+
+I'm here to help you understand and improve your skin health through intelligent tracking and insights.
+
+*What I'll help you with:*
+� **Smart Analysis** - AI-powered skin photo analysis
+📈 **Progress Tracking** - Visual timeline of your skin journey  
+🧴 **Product Testing** - Track what works (and what doesn't)
+⚠️ **Trigger Detection** - Identify what affects your skin
+💡 **Personalized Insights** - Weekly reports and recommendations
+
+Let's get you set up for success! 🚀"""
+
+HELP_TEXT = """📚 *SkinTrack Help Guide*
+
+🎯 **Core Features:**
+
+📸 **Photo Check-ins**
+• Upload clear, well-lit photos
+• Try to use consistent lighting & angle
+• AI analyzes progress over time
+
+📝 **Daily Logging**  
+• Track symptoms (severity 1-5)
+• Note triggers affecting your skin
+• Record product usage
+
+🎯 **Area Tracking**
+• Focus on specific skin areas
+• Compare improvement across zones
+• Get targeted insights
+
+🧴 **Product Management**
+• Test what works for your skin
+• Track product effectiveness
+• Get usage recommendations
+
+📊 **Progress & Insights**
+• View your improvement timeline
+• Get AI-powered weekly reports
+• Identify patterns and trends
+
+*🏆 Pro Tips:*
+• Log daily for best results
+• Take photos in similar conditions
+• Be consistent with timing
+• Track triggers immediately
+
+*📱 Quick Commands:*
+/start - Main menu
+/log - Quick logging
+/progress - View improvements  
+/help - This guide
+
+Questions? Just ask! 💬"""
+
+# Screens with no per-user content, shown straight from the callback table
+QUICK_PHOTO_TEXT = (
+    "📸 *Quick Photo Check-in*\n\n"
+    "Upload a clear, well-lit photo of your skin.\n\n"
+    "*💡 Tips:*\n"
+    "• Use consistent lighting\n"
+    "• Same angle as previous photos\n"
+    "• Clean skin (no makeup)\n\n"
+    "Ready? Upload your photo now! 📷"
+)
+PHOTO_QUEUE_FULL_TEXT = (
+    "📷 Photo uploaded successfully!\n\n"
+    "Skin analysis is busy right now, so this photo was saved without it. "
+    "Please try again later for an analysis."
+)
+LOG_PHOTO_TEXT = "📷 Please upload a photo of your skin. Make sure it's well-lit and clear!"
+REMINDER_SETTINGS_TEXT = (
+    "⏰ *Reminder Settings*\n\nChoose when you'd like to receive daily skin check-in reminders:"
+)
+
+TIMELINE_TEXT = (
+    "📈 *Your Skin Health Timeline*\n\n"
+    "View your complete skin health journey with:\n"
+    "• 📊 All symptoms, triggers, and treatments\n"
+    "• 🔍 AI insights on what's working\n"
+    "• 📈 Trends and patterns over time\n"
+    "• 📷 Photo timeline with analysis\n\n"
+    "Choose how to open your timeline:"
+)
+
+# Static onboarding copy
+ONBOARDING_STEP1_TEXT = """🎯 *Your Skin Journey Starts Here*
+
+*Here's how SkinTrack works:*
+
+🔬 **Week 1-2: Baseline**
+• Upload 2-3 photos to establish your starting point
+• Log any current products you're using
+• Note triggers as they happen
+
+📈 **Week 3+: Track Progress**  
+• Continue daily logging
+• Watch your progress timeline grow
+• Get weekly insights and recommendations
+
+💡 **The Secret:** Consistency beats perfection! Even 30 seconds a day makes a huge difference.
+
+Ready to set up your tracking preferences?"""
+
+ONBOARDING_LEARN_TEXT = """🧠 *Why SkinTrack Works*
+
+**🔬 Smart Analysis**
+• AI compares your photos over time
+• Tracks blemish reduction, texture improvement
+• Identifies patterns you might miss
+
+**📊 Data-Driven Insights**  
+• Correlates products with skin improvements
+• Identifies your personal trigger patterns
+• Provides actionable recommendations
+
+**🎯 Focused Tracking**
+• Track specific problem areas
+• See progress where it matters most
+• Get targeted treatment suggestions
+
+**💡 Personalized Reports**
+• Weekly summaries of your progress
+• Product effectiveness analysis
+• Next steps for improvement
+
+*Real Results:* Users see 40% better skin improvement when tracking consistently vs. guessing! 📈"""
+
+ONBOARDING_REMINDER_TEXT = """⏰ *Daily Check-in Reminder*
+
+*When would you like your daily skin check-in reminder?*
+
+Choose a time when you typically:
+• Have good lighting for photos
+• Can spend 1-2 minutes logging
+• Are in your usual environment
+
+*📱 You'll get a gentle reminder to:*
+• Rate how your skin feels today
+• Log any new products or triggers  
+• Take a quick progress photo"""
+
+ONBOARDING_AREAS_TEXT = """🎯 *Focus Areas (Optional)*
+
+*Want to track specific problem areas?*
+
+You can focus on particular areas like:
+• Forehead acne
+• Cheek redness  
+• T-zone oiliness
+• Chin breakouts
+
+*Benefits:*
+• More targeted insights
+• Compare improvement across areas
+• Specialized recommendations
+
+*You can always add or change these later in Settings.*"""
+
+ONBOARDING_COMPLETE_TEXT = """🎉 *You're All Set!*
+
+Welcome to your skin health journey! Here's what to do next:
+
+**📸 Take Your First Photo**
+• Upload a baseline photo to start tracking
+• Use good lighting and a consistent angle
+
+**📝 Start Daily Logging**  
+• Rate how your skin feels today
+• Log any products you're currently using
+
+**🔍 Explore Your Tools**
+• Check out the Progress section
+• Review help for detailed guides
+
+*🏆 Pro Tip:* The first week is about establishing your baseline. Don't worry about perfect photos - consistency matters more!
+
+Ready to start your journey?"""
+
+# /progress and /skin message sections, filled with str.format_map
+PROGRESS_ACTIVITY_TEMPLATE = (
+    "📊 *30-day Progress Overview*\n\n"
+    "📝 *Activity Summary:*\n"
+    "• Products logged: {product_count}\n"
+    "• Triggers logged: {trigger_count}\n"
+    "• Symptoms logged: {symptom_count}\n"
+    "• Photos uploaded: {photo_count}\n\n"
+)
+PROGRESS_MOOD_TEMPLATE = (
+    "😊 *Daily Mood Tracking:*\n"
+    "• Check-ins: {total_entries}\n"
+    "• Average: {average_rating:.1f}/5.0\n"
+    "• Trend: {trend}\n"
+)
+PROGRESS_SKIN_PENDING_TEMPLATE = (
+    "📸 *Skin Progress:*\n"
+    "{message}\n"
+    "_Upload more photos to track your skin improvement!_"
+)
+PROGRESS_SKIN_TEMPLATE = (
+    "🎯 *Skin Progress Analysis:* {emoji}\n"
+    "📸 Photos analyzed: {total_photos}\n"
+    "📅 Period: {start:.10} to {end:.10}\n\n"
+    "🔍 *Blemish Analysis:*\n"
+    "• Current: {current_percent:.1f}%\n"
+    "• Initial: {initial_percent:.1f}%\n"
+    "• Change: {change_text}\n"
+    "• Average: {average_blemish_percent:.1f}%\n\n"
+    "📏 *Face Area Metrics:*\n"
+    "• Current: {current_px:,} pixels\n"
+    "• Initial: {initial_px:,} pixels\n\n"
+    "{emoji} *Overall {direction}* detected in skin condition!"
+)
+SKIN_LATEST_TEMPLATE = (
+    "🔬 *Detailed Skin Analysis*\n\n"
+    "📸 *Latest Photo Analysis:*\n"
+    "• Date: {timestamp:.10}\n"
+    "• Face Area: {face_area_px:,} pixels\n"
+    "• Blemish Area: {blemish_area_px:,} pixels\n"
+    "• Blemish Percentage: {percent_blemished:.1f}%\n\n"
+)
+SKIN_PROGRESS_TEMPLATE = (
+    "{trend_emoji} *30-Day Progress:*\n"
+    "• Photos analyzed: {total_photos}\n"
+    "• Average blemish %: {average_blemish_percent:.1f}%\n"
+    "• Change: {change:+.1f}%\n\n"
+)
+SKIN_WEEK_TEMPLATE = "• Week of {week_start}: {avg_blemish_percent:.1f}% ({photo_count} photos)\n"
+
+# Symptom logging conversation states
+AWAIT_CUSTOM_SYMPTOM, AWAIT_SEVERITY = range(2)
+
+def _toggle_selection(selected: Dict[str, None], item: str) -> None:
+    """Add ``item`` to a multi-tap selection, or remove it if already chosen.
+
+    Selections are dicts used as insertion-ordered sets, so a toggle is a
+    hash lookup and items keep the order they were tapped in.
+    """
+    if item in selected:
+        del selected[item]
+    else:
+        selected[item] = None
+
+
+# callback_data carries names with spaces as underscores
+_SLUG = str.maketrans(" ", "_")
+_UNSLUG = str.maketrans("_", " ")
+# Lower-cased slug in one pass, for keys matched back through a lookup table
+_LOWER_SLUG = str.maketrans(dict(zip(string.ascii_uppercase, string.ascii_lowercase)) | {" ": "_"})
+
+# Emoji shown next to a severity rating, indexed by severity (1-5)
+SEVERITY_EMOJI = ("", "😐", "😕", "😖", "😣", "😫")
+# Rows of the delete-data screen, as (get_data_summary key, label)
+DATA_LABELS = (
+    ('photos', '📸 Photos'),
+    ('products', '🧴 Product logs'),
+    ('triggers', '⚠️ Trigger logs'),
+    ('symptoms', '🏥 Symptom logs'),
+    ('moods', '😊 Daily moods'),
+    ('kpis', '📊 Skin analysis'),
+)
+# Areas offered when setting up tracking areas
+COMMON_AREAS = (
+    "Forehead", "Left Cheek", "Right Cheek", "Nose",
+    "T-Zone", "Chin", "Jawline", "Under Eyes",
+)
+# Labels and emoji for check-in (mood_rate_) and reminder (rating_) buttons,
+# indexed by rating (1-5)
+MOOD_LABELS = ("", "Very Bad", "Bad", "Okay", "Good", "Excellent")
+MOOD_EMOJI = ("", "🔴", "🟠", "🟡", "🟢", "✅")
+RATING_LABELS = ("", "Flare-up", "Bad", "Okay", "Good", "Excellent")
+RATING_EMOJI = ("", "😫", "😕", "😐", "🙂", "😃")
+MOOD_LOGGED_TEMPLATE = (
+    "✅ *Mood Logged!*\n\n"
+    "Today's skin feeling: {emoji} {label}\n\n"
+    "Thanks for checking in! Continue with your daily log?"
+)
+RATING_LOGGED_TEMPLATE = "✅ Thanks for sharing! Logged: {emoji} {label}\n\nTake care of your skin today! 💚"
+MOOD_LOG_ERROR_TEXT = "❌ Sorry, there was an error logging your mood. Please try again later."
+
+# Generated summaries are keyed by the log rows they cover, so any new log
+# already misses the cache; the TTL only bounds how long one is reused.
+SUMMARY_CACHE_TTL = 6 * 60 * 60
+SUMMARY_CACHE_MAX = 1000
+
+# Concurrent OpenAI requests allowed across all users
+OPENAI_MAX_CONCURRENCY = 8
+
+# Where the timeline web app is hosted unless BASE_URL overrides it
+DEFAULT_BASE_URL = 'https://rstrinati.github.io/SkinTracker'
+
+# Command list for the persistent menu; BotCommand is immutable, so it is
+# built once here and reused on every start
+BOT_COMMANDS = (
+    BotCommand("log", "📝 Log an entry"),
+    BotCommand("timeline", "📈 View timeline"),
+    BotCommand("progress", "📊 View progress"),
+    BotCommand("skin", "🔬 Skin analysis"),
+    BotCommand("settings", "⚙️ Settings"),
+)
+
+# Digest of the last command list pushed to Telegram, so restarts can skip it
+MENU_STATE_FILE = os.getenv(
+    'MENU_STATE_FILE', os.path.join(tempfile.gettempdir(), 'skintracker_menu.sha1')
+)
+
+
+class _ReplyAdapter:
+    """Query stand-in that answers with a reply, so screens built for
+    callback queries can also follow a text message."""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message
+
+    async def edit_message_text(self, text, parse_mode=None, reply_markup=None):
+        return await self.message.reply_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
+
+
+@dataclass(frozen=True, slots=True)
+class BotConfig:
+    """Settings read from the environment once, when the bot is created."""
+
+    token: str
+    base_url: str = DEFAULT_BASE_URL
+    railway_env: bool = False
+    supabase_url_set: bool = False
+    max_concurrent_updates: int = MAX_CONCURRENT_UPDATES
+    update_queue_max: int = UPDATE_QUEUE_MAX
+    shutdown_drain_timeout: float = SHUTDOWN_DRAIN_TIMEOUT
+    webhook_max_connections: int = WEBHOOK_MAX_CONNECTIONS
+    # Keeps user_data and the symptom conversation across graceful restarts
+    persistence_file: Optional[str] = None
+    sender_count: int = SENDER_COUNT
+    outbox_max: int = OUTBOX_MAX
+    known_users_max: int = KNOWN_USERS_MAX
+    summary_cache_ttl: int = SUMMARY_CACHE_TTL
+    summary_cache_max: int = SUMMARY_CACHE_MAX
+    openai_max_concurrency: int = OPENAI_MAX_CONCURRENCY
+    analysis_workers: int = ANALYSIS_WORKERS
+    photo_queue_max: int = PHOTO_QUEUE_MAX
+
+    @classmethod
+    def from_env(cls) -> "BotConfig":
+        token = os.getenv('TELEGRAM_BOT_TOKEN')
+        if not token:
+            raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
+        return cls(
+            token=token,
+            base_url=os.getenv('BASE_URL', DEFAULT_BASE_URL),
+            railway_env=bool(os.getenv("RAILWAY_ENVIRONMENT")),
+            supabase_url_set=bool(os.getenv("NEXT_PUBLIC_SUPABASE_URL")),
+            summary_cache_ttl=int(os.getenv('SUMMARY_CACHE_TTL', SUMMARY_CACHE_TTL)),
+            webhook_max_connections=int(os.getenv('WEBHOOK_MAX_CONNECTIONS', WEBHOOK_MAX_CONNECTIONS)),
+            analysis_workers=int(os.getenv('ANALYSIS_WORKERS', ANALYSIS_WORKERS)),
+            persistence_file=os.getenv('PERSISTENCE_FILE') or None,
+            shutdown_drain_timeout=float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', SHUTDOWN_DRAIN_TIMEOUT)),
+        )
+
+
 class SkinHealthBot:
+    __slots__ = (
+        "config",
+        "token",
+        "application",
+        "bot",
+        "_username",
+        "database",
+        "kpi_analyzer",
+        "_http",
+        "openai_service",
+        "scheduler",
+        "_analysis_pool",
+        "_photo_queue",
+        "_photo_workers",
+        "_initialized",
+        "_initializing",
+        "_known_users",
+        "_queue",
+        "_workers",
+        "_pending",
+        "_outbox",
+        "_edit_debouncers",
+        "_summary_cache",
+        "_inflight",
+        "_openai_limit",
+        "default_products",
+        "default_triggers",
+        "symptoms",
+        "_default_product_markup",
+        "_default_trigger_markup",
+        "_symptom_buttons",
+        "_symptom_markup",
+        "_log_markup",
+        "_main_menu_markup",
+        "_returning_user_markup",
+        "_welcome_markup",
+        "_onboarding_step1_markup",
+        "_onboarding_learn_markup",
+        "_onboarding_reminder_markup",
+        "_onboarding_areas_markup",
+        "_onboarding_complete_markup",
+        "_reminder_time_markup",
+        "_mood_logged_markup",
+        "_help_markup",
+        "_reminder_settings_markup",
+        "_delete_data_markup",
+        "_callback_names",
+        "_callback_actions",
+        "_callback_routes",
+        "_text_handlers",
+        "_webhook_replies",
+    )
+
     def __init__(self):
-        self.token = os.getenv('TELEGRAM_BOT_TOKEN')
-        if not self.token:
-            raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
+        self.config = BotConfig.from_env()
+        self.token = self.config.token
         
-        self.application = Application.builder().token(self.token).build()
+        builder = Application.builder().token(self.token)
+        if self.config.persistence_file:
+            # Held in memory and written once, when the application shuts down
+            builder = builder.persistence(PicklePersistence(
+                self.config.persistence_file,
+                store_data=PersistenceInput(bot_data=False, chat_data=False, callback_data=False),
+                on_flush=True,
+            ))
+        self.application = builder.build()
         self.bot = None  # Will be set after initialization
+        # Lower-cased bot username, for matching /command@username
+        self._username: Optional[str] = None
         self.database = Database()
-        self.openai_service = OpenAIService()
+        self.kpi_analyzer = SkinKPIAnalyzer(self.database)
+        # One long-lived keep-alive client for outbound API calls
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            timeout=30,
+        )
+        self.openai_service = OpenAIService(http_client=self._http)
         self.scheduler: Optional[ReminderScheduler] = None
-        # self.analysis_provider = InsightFaceProvider()  # Temporarily disabled
-        self.analysis_provider = None
+        # Photo analysis runs here; workers start on the first photo. Spawned
+        # rather than forked, since this process already runs threads.
+        self._analysis_pool = ProcessPoolExecutor(
+            max_workers=self.config.analysis_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
 
         self._initialized = False
         self._initializing = False
 
+        # Telegram IDs known to have a users row; lets /start skip the lookup
+        self._known_users: set[int] = set()
+
+        # Webhook updates wait here for one of the fixed pool of workers
+        self._queue: "asyncio.Queue[Update]" = asyncio.Queue(maxsize=self.config.update_queue_max)
+        self._workers: List[asyncio.Task] = []
+        # Background work spawned by handlers and still running
+        self._pending: set[asyncio.Task] = set()
+        # Message edits made by callback handlers, delivered by sender tasks
+        self._outbox = EditOutbox(self.config.sender_count, self.config.outbox_max)
+        # Saved photos waiting for analysis, as (user_id, temp_path, image_id)
+        self._photo_queue: asyncio.Queue = asyncio.Queue(maxsize=self.config.photo_queue_max)
+        self._photo_workers: List[asyncio.Task] = []
+        # Toggle edits waiting out TOGGLE_EDIT_DELAY, by (chat_id, message_id)
+        self._edit_debouncers: Dict[Tuple[int, int], asyncio.TimerHandle] = {}
+
+        # LRU of summary digest -> (created monotonic time, summary text)
+        self._summary_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        # Summary generations currently running, shared by concurrent callers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._openai_limit = asyncio.Semaphore(self.config.openai_max_concurrency)
+
         logger.info(
             "SkinHealthBot instantiated (railway_env=%s, supabase_url_set=%s)",
-            bool(os.getenv("RAILWAY_ENVIRONMENT")),
-            bool(os.getenv("NEXT_PUBLIC_SUPABASE_URL")),
+            self.config.railway_env,
+            self.config.supabase_url_set,
         )
 
         # Default fallback options if database tables are empty
-        self.default_products = [
+        self.default_products = (
             "Cicaplast", "Azelaic Acid", "Enstilar", "Cerave Moisturizer",
             "Sunscreen", "Retinol", "Niacinamide", "Salicylic Acid"
-        ]
+        )
 
-        self.default_triggers = [
+        self.default_triggers = (
             "Sun exposure",
             "Stress",
             "Hot weather",
             "Sweating",
             "Spicy food",
             "Alcohol",
-        ]
+        )
 
-        self.symptoms = [
+        self.symptoms = (
             "Redness",
             "Bumps",
             "Itching",
             "Dryness",
             "Burning",
             "Other",
-        ]
-        
+        )
+
+        # Keyboards for the static option lists, built once; per-user lists
+        # and menus with selections are still rendered on demand.
+        self._default_product_markup = self._build_two_col_markup(
+            "product_", self.default_products + ("Other",)
+        )
+        self._default_trigger_markup = self._build_trigger_markup(
+            {name.translate(_LOWER_SLUG): name for name in self.default_triggers + ("Other",)}, {}
+        )
+        # (label, callback_data) per symptom button; only the ✅ varies per tap
+        self._symptom_buttons = tuple(
+            (name, f"symptom_toggle_{name.translate(_LOWER_SLUG)}") for name in self.symptoms
+        )
+        self._symptom_markup = self._build_symptom_markup({})
+        self._log_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("📷 Add Photo", callback_data="log_photo"),
+                InlineKeyboardButton("🧴 Log Product", callback_data="log_product"),
+            ],
+            [
+                InlineKeyboardButton("⚡ Log Trigger", callback_data="log_trigger"),
+                InlineKeyboardButton("📊 Log Symptoms", callback_data="log_symptom"),
+            ],
+        ])
+
+        # Static menus reused on every render
+        self._main_menu_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("� Photo Check-in", callback_data="quick_photo"),
+                InlineKeyboardButton("📝 Daily Log", callback_data="daily_checkin")
+            ],
+            [
+                InlineKeyboardButton("📊 Progress", callback_data="menu_progress"),
+                InlineKeyboardButton("🧠 Insights", callback_data="menu_summary")
+            ],
+            [
+                InlineKeyboardButton("🧴 Products", callback_data="area_products"),
+                InlineKeyboardButton("🎯 Areas", callback_data="area_management")
+            ],
+            [
+                InlineKeyboardButton("⚙️ Settings", callback_data="menu_settings"),
+                InlineKeyboardButton("❓ Help", callback_data="menu_help")
+            ]
+        ])
+        self._returning_user_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("📸 Quick Photo", callback_data="quick_photo"),
+                InlineKeyboardButton("📝 Daily Check-in", callback_data="daily_checkin")
+            ],
+            [
+                InlineKeyboardButton("📊 View Progress", callback_data="menu_progress"),
+                InlineKeyboardButton("🧠 Weekly Summary", callback_data="menu_summary")
+            ],
+            [InlineKeyboardButton("📋 Full Menu", callback_data="show_main_menu")]
+        ])
+        self._welcome_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("✨ Let's Get Started!", callback_data="onboarding_start")],
+            [InlineKeyboardButton("📚 Learn More", callback_data="onboarding_learn")]
+        ])
+        self._onboarding_step1_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("✅ Yes, Let's Set Up!", callback_data="onboarding_reminder")],
+            [InlineKeyboardButton("🔄 Tell Me More", callback_data="onboarding_learn")]
+        ])
+        self._onboarding_learn_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🚀 I'm Ready to Start!", callback_data="onboarding_reminder")],
+            [InlineKeyboardButton("📱 Quick Demo", callback_data="show_main_menu")]
+        ])
+        self._onboarding_reminder_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("🌅 Morning (9 AM)", callback_data="set_reminder_09:00"),
+                InlineKeyboardButton("🏙️ Midday (12 PM)", callback_data="set_reminder_12:00")
+            ],
+            [
+                InlineKeyboardButton("🌆 Evening (6 PM)", callback_data="set_reminder_18:00"),
+                InlineKeyboardButton("🌙 Night (9 PM)", callback_data="set_reminder_21:00")
+            ],
+            [InlineKeyboardButton("⏭️ Skip for Now", callback_data="onboarding_areas")]
+        ])
+        self._onboarding_areas_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🎯 Set Up Areas", callback_data="area_setup_new")],
+            [InlineKeyboardButton("⏭️ Skip - Track Everything", callback_data="onboarding_complete")]
+        ])
+        self._onboarding_complete_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📸 Take First Photo", callback_data="quick_photo")],
+            [InlineKeyboardButton("📝 Daily Check-in", callback_data="daily_checkin")],
+            [InlineKeyboardButton("🏠 Explore Menu", callback_data="show_main_menu")]
+        ])
+        self._reminder_time_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(t, callback_data=f"reminder_{t}")] for t in ("09:00", "12:00", "18:00")
+        ])
+        self._mood_logged_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📝 Continue Check-in", callback_data="daily_checkin")],
+            [InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")],
+        ])
+        self._help_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")],
+            [InlineKeyboardButton("🚀 Quick Start Guide", callback_data="quick_start_guide")]
+        ])
+        self._reminder_settings_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🌅 09:00", callback_data="set_reminder_09:00")],
+            [InlineKeyboardButton("🏙️ 12:00", callback_data="set_reminder_12:00")],
+            [InlineKeyboardButton("🌆 18:00", callback_data="set_reminder_18:00")],
+            [InlineKeyboardButton("🌙 21:00", callback_data="set_reminder_21:00")],
+            [InlineKeyboardButton("❌ Disable", callback_data="set_reminder_disable")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="settings_back")]
+        ])
+        self._delete_data_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📸 Delete Photos Only", callback_data="delete_data_photos")],
+            [InlineKeyboardButton("📝 Delete Logs Only", callback_data="delete_data_logs")],
+            [InlineKeyboardButton("🗑️ Delete Everything", callback_data="delete_data_all")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="settings_back")]
+        ])
+
+        # Static webhook replies, JSON-encoded once; see webhook_reply.
+        self._webhook_replies: Dict[str, bytes] = {
+            "log": self._encode_reply("What would you like to log today?", self._log_markup),
+            "help": self._encode_reply(HELP_TEXT, self._help_markup, ParseMode.MARKDOWN),
+        }
+
+        # callback_data -> display name for the static options above, so
+        # handle_callback can skip the slug reversal for them.
+        self._callback_names: Dict[str, str] = {
+            f"product_{name.translate(_SLUG)}": name
+            for name in self.default_products + ("Other",)
+        }
+        self._callback_names.update((data, name) for name, data in self._symptom_buttons)
+
+        # Exact callback_data -> handler taking (update, context); looked up
+        # first in handle_callback, then the prefix routes below.
+        self._callback_actions: Dict[str, Callable] = {
+            "show_main_menu": lambda update, context: self.send_main_menu(update),
+            "daily_checkin": self._handle_daily_checkin,
+            "menu_log": self.log_command,
+            "menu_progress": self.progress_command,
+            "menu_summary": self.summary_command,
+            "menu_settings": self._show_settings,
+            "menu_help": self.help_command,
+            "quick_photo": self._static_screen(QUICK_PHOTO_TEXT),
+            "log_photo": self._static_screen(LOG_PHOTO_TEXT, parse_mode=None),
+            "log_product": lambda update, context: self._show_product_options(update.callback_query),
+            "log_trigger": self._start_trigger_log,
+            "log_symptom": self._start_symptom_log,
+            "trigger_submit": self._submit_triggers,
+            "settings_add_condition": self._prompt_condition_name,
+            "settings_reminder": self._static_screen(REMINDER_SETTINGS_TEXT, self._reminder_settings_markup),
+            "settings_products": lambda update, context: self._show_product_management(
+                update.callback_query, context, update.effective_user.id
+            ),
+            "settings_delete_data": lambda update, context: self._show_delete_data_options(
+                update.callback_query, context, update.effective_user.id
+            ),
+            "settings_back": self._show_settings,
+            "onboarding_start": self._static_screen(ONBOARDING_STEP1_TEXT, self._onboarding_step1_markup),
+            "onboarding_learn": self._static_screen(ONBOARDING_LEARN_TEXT, self._onboarding_learn_markup),
+            "onboarding_reminder": self._static_screen(ONBOARDING_REMINDER_TEXT, self._onboarding_reminder_markup),
+            "onboarding_areas": self._static_screen(ONBOARDING_AREAS_TEXT, self._onboarding_areas_markup),
+            "onboarding_complete": lambda update, context: self._complete_onboarding(
+                update.callback_query, context
+            ),
+        }
+
+        # callback_data prefix -> handler taking (update, context). No prefix
+        # may start another one, so order only affects speed: the one-tap
+        # "record a value" buttons, by far the most pressed, are tried first.
+        self._callback_routes: Dict[str, Callable] = {
+            "rating_": self._handle_rating,
+            "mood_rate_": self._handle_mood_rate,
+            "reminder_": self._handle_reminder_time,
+            "set_reminder_": self._handle_set_reminder,
+            "checkin_": self._handle_checkin_actions,
+            "area_": self._handle_area_management,
+            "delete_data_": self._handle_delete_data,
+            "confirm_delete_": self._handle_confirm_delete,
+            "condition_type_": self._handle_condition_type,
+            "product_": self._handle_product_choice,
+            "edit_product_": self._handle_edit_product,
+            "rename_product_": self._handle_rename_product,
+            "delete_product_": self._handle_delete_product,
+            "trigger_toggle_": self._toggle_trigger,
+            "symptom_toggle_": self._toggle_symptom,
+        }
+        # Free-text reply expected next, keyed by context.user_data["awaiting"]
+        self._text_handlers: Dict[str, Callable] = {
+            "custom_product": self._save_custom_product,
+            "custom_trigger": self._save_custom_trigger,
+            "condition_name": self._save_condition_name,
+            "new_product_name": self._save_new_product_name,
+        }
+
         self._setup_handlers()
 
     def _setup_handlers(self):
@@ -92,26 +792,67 @@ class SkinHealthBot:
         self.application.add_handler(CommandHandler("symptom", self.quick_symptom_command))
         self.application.add_handler(CommandHandler("product", self.quick_product_command))
         
+        # Symptom custom-name and severity replies only reach Python while the
+        # user is in that step; any other button leaves the flow. It mixes
+        # button and text steps on purpose, so per_message stays False and
+        # PTB's warning about that is silenced for this constructor only.
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore", message=r".*CallbackQueryHandler", category=PTBUserWarning
+            )
+            symptom_flow = ConversationHandler(
+                entry_points=[
+                    CallbackQueryHandler(self._enter_custom_symptom, pattern=r"^symptom_toggle_other$"),
+                    CallbackQueryHandler(self._enter_severity, pattern=r"^symptom_submit$"),
+                ],
+                states={
+                    AWAIT_CUSTOM_SYMPTOM: [
+                        MessageHandler(filters.TEXT & ~filters.COMMAND, self._save_custom_symptom),
+                    ],
+                    AWAIT_SEVERITY: [
+                        MessageHandler(filters.Regex(_SEVERITY_RE), self._save_severity),
+                        MessageHandler(filters.TEXT & ~filters.COMMAND, self._reject_severity),
+                    ],
+                },
+                fallbacks=[CallbackQueryHandler(self._leave_symptom_flow)],
+                allow_reentry=True,
+                name="symptom_log",
+                persistent=self.application.persistence is not None,
+            )
+        self.application.add_handler(symptom_flow)
+
         # Callback query handlers
         self.application.add_handler(CallbackQueryHandler(self.handle_callback))
         
-        # Photo handler
-        self.application.add_handler(MessageHandler(filters.PHOTO, self.handle_photo))
-        
-        # Text message handler for severity rating
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text))
+        # Photo and plain text messages share one handler so each update runs
+        # through a single filter check; _route_message picks the target.
+        self.application.add_handler(
+            MessageHandler(filters.PHOTO | (filters.TEXT & ~filters.COMMAND), self._route_message)
+        )
 
     async def _setup_persistent_menu(self):
-        """Configure bot command list for quick access."""
-        commands = [
-            BotCommand("log", "📝 Log an entry"),
-            BotCommand("timeline", "📈 View timeline"),
-            BotCommand("progress", "📊 View progress"),
-            BotCommand("skin", "🔬 Skin analysis"),
-            BotCommand("settings", "⚙️ Settings"),
-        ]
-        await self.bot.set_my_commands(commands)
+        """Configure bot command list for quick access.
+
+        Skipped when MENU_STATE_FILE shows this exact list was already set.
+        """
+        digest = hashlib.sha1(json.dumps(
+            [self.bot.id, [[c.command, c.description] for c in BOT_COMMANDS]]
+        ).encode()).hexdigest()
+        try:
+            with open(MENU_STATE_FILE) as f:
+                if f.read().strip() == digest:
+                    logger.info("Persistent menu unchanged; skipping Telegram update")
+                    return
+        except OSError:
+            pass
+
+        await self.bot.set_my_commands(BOT_COMMANDS)
         await self.bot.set_chat_menu_button()
+        try:
+            with open(MENU_STATE_FILE, "w") as f:
+                f.write(digest)
+        except OSError:
+            logger.warning("Could not record menu state in %s", MENU_STATE_FILE)
 
     async def initialize(self):
         """Initialize the bot and database."""
@@ -126,9 +867,10 @@ class SkinHealthBot:
 
         self._initializing = True
         logger.info(
-            "Starting SkinHealthBot.initialize (railway_env=%s, supabase_url_set=%s)",
-            bool(os.getenv("RAILWAY_ENVIRONMENT")),
-            bool(os.getenv("NEXT_PUBLIC_SUPABASE_URL")),
+            "Starting SkinHealthBot.initialize (railway_env=%s, supabase_url_set=%s, loop=%s)",
+            self.config.railway_env,
+            self.config.supabase_url_set,
+            type(asyncio.get_running_loop()).__module__,
         )
         try:
             logger.info("Initializing database connection")
@@ -141,30 +883,43 @@ class SkinHealthBot:
 
             # Don't call application.start() for webhook mode - it starts polling
             self.bot = self.application.bot  # Make sure this is after `initialize()`
+            self._username = (self.bot.username or "").lower()
 
             logger.info("Configuring persistent menu")
             await self._setup_persistent_menu()
 
             # Initialize reminder scheduler now that bot is available
-            self.scheduler = ReminderScheduler(self.bot)
+            # Started only after the stored reminders are queued, so
+            # APScheduler adds them all in one pass when it starts
+            self.scheduler = ReminderScheduler(self.bot, start=False)
             logger.info("Reminder scheduler initialized")
 
             users = (await self.database.get_users_with_reminders()) or []
             logger.info("Loaded %s users with reminders", len(users))
-            scheduled = 0
             for user in users:
-                reminder_time = user.get("reminder_time")
-                if reminder_time:
-                    self.scheduler.schedule_daily_reminder(
-                        user["telegram_id"], reminder_time, user.get("timezone", "UTC")
-                    )
-                    scheduled += 1
+                self._remember_user(user["telegram_id"])
+            scheduled = self.scheduler.schedule_daily_reminders(
+                (user["telegram_id"], user["reminder_time"], user.get("timezone") or "UTC")
+                for user in users
+                if user.get("reminder_time")
+            )
+            self.scheduler.start()
 
             if scheduled:
                 logger.info("Scheduled %s reminder jobs", scheduled)
             else:
                 logger.info("No reminders scheduled")
 
+            self._workers = [
+                asyncio.create_task(self._worker())
+                for _ in range(self.config.max_concurrent_updates)
+            ]
+            self._outbox.start()
+            self._photo_workers = [
+                asyncio.create_task(self._photo_worker())
+                for _ in range(self.config.analysis_workers)
+            ]
+
             self._initialized = True
             logger.info("Bot initialized successfully")
         except Exception:
@@ -184,6 +939,64 @@ class SkinHealthBot:
             return
 
         logger.info("Starting SkinHealthBot.shutdown")
+        if not self._queue.empty():
+            logger.info("Waiting for %s queued updates", self._queue.qsize())
+        try:
+            await asyncio.wait_for(self._queue.join(), self.config.shutdown_drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Updates still running after %ss; cancelling workers (%s queued)",
+                self.config.shutdown_drain_timeout,
+                self._queue.qsize(),
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self._edit_debouncers:
+            # Let trailing toggle edits reach the outboxes
+            await asyncio.sleep(TOGGLE_EDIT_DELAY)
+        await self._outbox.close(self.config.shutdown_drain_timeout)
+
+        if not self._photo_queue.empty():
+            logger.info("Waiting for %s queued photos", self._photo_queue.qsize())
+        try:
+            await asyncio.wait_for(self._photo_queue.join(), self.config.shutdown_drain_timeout)
+        except asyncio.TimeoutError:
+            # Photos still waiting are left unanalysed; the one a worker is
+            # on deletes its own temp file when the worker is cancelled
+            dropped = []
+            while not self._photo_queue.empty():
+                dropped.append(self._photo_queue.get_nowait()[1])
+                self._photo_queue.task_done()
+            logger.warning(
+                "Photo analysis still running after %ss; dropping %s queued photos",
+                self.config.shutdown_drain_timeout,
+                len(dropped),
+            )
+            for temp_path in dropped:
+                await self._remove_temp_file(temp_path)
+        for worker in self._photo_workers:
+            worker.cancel()
+        await asyncio.gather(*self._photo_workers, return_exceptions=True)
+        self._photo_workers = []
+        self._analysis_pool.shutdown(wait=False, cancel_futures=True)
+
+        if self._pending:
+            logger.info("Waiting for %s background tasks", len(self._pending))
+            # wait_for cancels the gather, and with it the tasks, on timeout
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*self._pending, return_exceptions=True),
+                    self.config.shutdown_drain_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Background tasks still running after %ss; cancelled them",
+                    self.config.shutdown_drain_timeout,
+                )
+
         # Don't call application.stop() since we didn't start polling
         try:
             await self.application.shutdown()
@@ -197,6 +1010,11 @@ class SkinHealthBot:
         except Exception:
             logger.exception("Error closing database connection")
 
+        try:
+            await self._http.aclose()
+        except Exception:
+            logger.exception("Error closing HTTP client")
+
         if self.scheduler:
             try:
                 self.scheduler.shutdown()
@@ -211,48 +1029,155 @@ class SkinHealthBot:
 
     async def send_main_menu(self, update: Update):
         """Send enhanced main menu with static flow."""
-        keyboard = [
-            [
-                InlineKeyboardButton("� Photo Check-in", callback_data="quick_photo"),
-                InlineKeyboardButton("📝 Daily Log", callback_data="daily_checkin")
-            ],
-            [
-                InlineKeyboardButton("📊 Progress", callback_data="menu_progress"),
-                InlineKeyboardButton("🧠 Insights", callback_data="menu_summary")
-            ],
-            [
-                InlineKeyboardButton("🧴 Products", callback_data="area_products"),
-                InlineKeyboardButton("🎯 Areas", callback_data="area_management")
-            ],
-            [
-                InlineKeyboardButton("⚙️ Settings", callback_data="menu_settings"),
-                InlineKeyboardButton("❓ Help", callback_data="menu_help")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
         message = update.message or update.callback_query.message
         await message.reply_text(
             "🏠 *Main Menu*\n\nWhat would you like to do?",
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            reply_markup=self._main_menu_markup
         )
 
 
     async def process_update(self, update_data: dict) -> None:
+        """Schedule a webhook update for processing and return immediately."""
         if not self.application.bot:
             raise RuntimeError("Bot not initialized yet")
 
         try:
             update = Update.de_json(update_data, self.application.bot)
-            await self.application.process_update(update)  # Process update directly for webhook mode
         except Exception:
-            logger.exception("Failed to process Telegram update")
+            logger.exception("Failed to parse Telegram update")
+            return
+
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning("Update queue full; dropping update %s", update.update_id)
+
+    @staticmethod
+    def _encode_reply(text: str, markup: InlineKeyboardMarkup, parse_mode: Optional[str] = None) -> bytes:
+        """Encode a sendMessage call, leaving the object open for ``chat_id``."""
+        payload = {"method": "sendMessage", "text": text, "reply_markup": markup.to_dict()}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        return json.dumps(payload)[:-1].encode()
+
+    def webhook_reply(self, update_data: dict) -> Optional[bytes]:
+        """Return a JSON Bot API method call to answer a static command inline.
+
+        Telegram executes a method returned in the webhook response body,
+        which saves a separate outbound request for /log and /help. Any
+        other update returns ``None`` and goes through normal processing,
+        as does a command addressed to another bot (``/help@OtherBot``).
+        """
+        message = update_data.get("message") or {}
+        text = message.get("text") or ""
+        chat_id = (message.get("chat") or {}).get("id")
+        if not chat_id or not text.startswith("/"):
+            return None
+
+        command, _, mention = text.split(maxsplit=1)[0][1:].partition("@")
+        if mention and mention.lower() != self._username:
+            return None
+        prefix = self._webhook_replies.get(command.lower())
+        if prefix is None:
+            return None
+        return prefix + b', "chat_id": %d}' % chat_id
+
+    async def _worker(self) -> None:
+        """Process queued updates one at a time until cancelled."""
+        while True:
+            update = await self._queue.get()
+            try:
+                await self.application.process_update(update)
+            except Exception:
+                logger.exception("Failed to process Telegram update")
+            finally:
+                self._queue.task_done()
 
+    async def _photo_worker(self) -> None:
+        """Analyse queued photos one at a time until cancelled."""
+        while True:
+            user_id, temp_path, image_id = await self._photo_queue.get()
+            try:
+                await self._analyse_photo(user_id, temp_path, image_id)
+            finally:
+                self._photo_queue.task_done()
+
+    def _send(self, query, text: str, **kwargs) -> None:
+        """Queue ``query.edit_message_text(text, **kwargs)`` for a sender task.
+
+        Callback handlers make every edit through here, so edits to a chat
+        arrive in order and a late keyboard edit can't overwrite the screen
+        that follows it. Handlers return as soon as the database work is
+        done instead of waiting on Telegram.
+        """
+        message = query.message
+        chat_id = message.chat_id if message else 0
+        # A _ReplyAdapter sends a new message each time, so none are skipped
+        if message is None or isinstance(query, _ReplyAdapter):
+            key = None
+        else:
+            key = (chat_id, message.message_id)
+        if not self._outbox.put(chat_id, key, query, text, kwargs):
+            logger.warning("Outbox full; dropping message edit for chat %s", chat_id)
+
+    def _schedule_edit(self, query, text: str, **kwargs) -> None:
+        """Queue an edit, coalescing edits to the same message.
+
+        The first edit goes out at once; any that follow within
+        TOGGLE_EDIT_DELAY replace each other, and only the last is sent.
+        Several quick taps on a multi-select keyboard then cost two edits
+        instead of one each.
+        """
+        message = query.message
+        if message is None:
+            self._send(query, text, **kwargs)
+            return
+        key = (message.chat_id, message.message_id)
+        loop = asyncio.get_running_loop()
+        handle = self._edit_debouncers.get(key)
+        if handle is None:
+            self._send(query, text, **kwargs)
+            self._edit_debouncers[key] = loop.call_later(
+                TOGGLE_EDIT_DELAY, self._edit_debouncers.pop, key, None
+            )
+        else:
+            handle.cancel()
+            self._edit_debouncers[key] = loop.call_later(
+                TOGGLE_EDIT_DELAY, self._flush_edit, key, query, text, kwargs
+            )
+
+    def _cancel_scheduled_edit(self, query) -> None:
+        """Drop a coalesced edit still waiting for ``query``'s message.
+
+        Called when a selection is submitted, so a late keyboard edit
+        cannot overwrite the screen that follows it; edits already queued
+        are skipped by the outbox once the next screen is queued.
+        """
+        message = query.message
+        if message is not None:
+            handle = self._edit_debouncers.pop((message.chat_id, message.message_id), None)
+            if handle is not None:
+                handle.cancel()
+
+    def _flush_edit(self, key: Tuple[int, int], query, text: str, kwargs: dict) -> None:
+        """Hand a debounced edit to the outbox."""
+        self._edit_debouncers.pop(key, None)
+        self._send(query, text, **kwargs)
 
     async def set_webhook(self, webhook_url: str) -> bool:
-        """Set webhook URL."""
+        """Set webhook URL.
+
+        Telegram is allowed the full number of parallel connections, since
+        the endpoint only queues updates, and sends only the update types
+        the handlers use.
+        """
         try:
-            await self.bot.set_webhook(url=webhook_url)
+            await self.bot.set_webhook(
+                url=webhook_url,
+                max_connections=self.config.webhook_max_connections,
+                allowed_updates=list(WEBHOOK_UPDATES),
+            )
             logger.info(f"Webhook set to: {webhook_url}")
             return True
         except Exception as e:
@@ -269,16 +1194,25 @@ class SkinHealthBot:
             logger.error(f"Failed to delete webhook: {e}")
             return False
 
+    def _remember_user(self, telegram_id: int) -> None:
+        """Record that a users row exists for ``telegram_id``."""
+        if len(self._known_users) < self.config.known_users_max:
+            self._known_users.add(telegram_id)
+
     async def start_command(self, update: Update, context):
         """Handle /start command - enhanced onboarding flow."""
         user = update.effective_user
         telegram_id = user.id
         
         try:
-            # Check if user exists
-            existing_user = await self.database.get_user_by_telegram_id(telegram_id)
-            
+            # Check if user exists, skipping the lookup for users seen before
+            if telegram_id in self._known_users:
+                existing_user = True
+            else:
+                existing_user = await self.database.get_user_by_telegram_id(telegram_id)
+
             if existing_user:
+                self._remember_user(telegram_id)
                 # Returning user - show quick menu
                 await self._show_returning_user_welcome(update, user.first_name)
                 return
@@ -290,30 +1224,14 @@ class SkinHealthBot:
                 first_name=user.first_name,
                 last_name=user.last_name
             )
+            self._remember_user(telegram_id)
             
-            welcome_message = f"""🌟 *Welcome to SkinTrack, {user.first_name}!*
-
-I'm here to help you understand and improve your skin health through intelligent tracking and insights.
-
-*What I'll help you with:*
-� **Smart Analysis** - AI-powered skin photo analysis
-📈 **Progress Tracking** - Visual timeline of your skin journey  
-🧴 **Product Testing** - Track what works (and what doesn't)
-⚠️ **Trigger Detection** - Identify what affects your skin
-💡 **Personalized Insights** - Weekly reports and recommendations
-
-Let's get you set up for success! 🚀"""
-            
-            keyboard = [
-                [InlineKeyboardButton("✨ Let's Get Started!", callback_data="onboarding_start")],
-                [InlineKeyboardButton("📚 Learn More", callback_data="onboarding_learn")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            welcome_message = WELCOME_TEMPLATE.format(name=user.first_name)
             
             await update.message.reply_text(
                 welcome_message,
                 parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
+                reply_markup=self._welcome_markup
             )
             
         except Exception as e:
@@ -326,39 +1244,14 @@ Let's get you set up for success! 🚀"""
         """Show quick welcome for returning users."""
         message = f"👋 Welcome back, {first_name}!\n\nWhat would you like to do today?"
         
-        keyboard = [
-            [
-                InlineKeyboardButton("📸 Quick Photo", callback_data="quick_photo"),
-                InlineKeyboardButton("📝 Daily Check-in", callback_data="daily_checkin")
-            ],
-            [
-                InlineKeyboardButton("📊 View Progress", callback_data="menu_progress"),
-                InlineKeyboardButton("🧠 Weekly Summary", callback_data="menu_summary")
-            ],
-            [InlineKeyboardButton("📋 Full Menu", callback_data="show_main_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(message, reply_markup=reply_markup)
+        await update.message.reply_text(message, reply_markup=self._returning_user_markup)
 
     async def log_command(self, update: Update, context):
         """Handle /log command - show logging options."""
-        keyboard = [
-            [
-                InlineKeyboardButton("📷 Add Photo", callback_data="log_photo"),
-                InlineKeyboardButton("🧴 Log Product", callback_data="log_product"),
-            ],
-            [
-                InlineKeyboardButton("⚡ Log Trigger", callback_data="log_trigger"),
-                InlineKeyboardButton("📊 Log Symptoms", callback_data="log_symptom"),
-            ],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
         message = update.message or update.callback_query.message
         await message.reply_text(
             "What would you like to log today?",
-            reply_markup=reply_markup,
+            reply_markup=self._log_markup,
         )
 
     async def summary_command(self, update: Update, context):
@@ -366,196 +1259,258 @@ Let's get you set up for success! 🚀"""
         user_id = update.effective_user.id
 
         try:
-            # Get user's recent logs
-            recent_logs = await self.database.get_user_logs(user_id, days=7)
-
             message = update.message or update.callback_query.message
 
+            # Acknowledge while the logs load; the placeholder is replaced
+            # either way, so the two round-trips are independent
+            recent_logs, placeholder = await asyncio.gather(
+                self.database.get_user_logs(user_id, days=7),
+                message.reply_text("⏳ Generating your summary…"),
+            )
+
             if not recent_logs:
-                await message.reply_text(
-                    "You don't have any logs from the past week. Start logging to get insights!"
+                await placeholder.edit_text(
+                    "You don't have any logs from the past week. Start logging to get insights!",
+                    reply_markup=self._main_menu_markup,
                 )
-                await self.send_main_menu(update)
                 return
 
-            # Generate AI summary
-            summary = await self.openai_service.generate_summary(recent_logs)
-
-            await message.reply_text(
-                f"📈 *Your Weekly Skin Health Summary*\n\n{summary}",
-                parse_mode=ParseMode.MARKDOWN,
-            )
-            await self.send_main_menu(update)
+            # The OpenAI call can take several seconds and should not hold
+            # an update worker
+            task = asyncio.create_task(self._finish_summary(placeholder, recent_logs))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
 
         except Exception as e:
             logger.exception("Error generating summary")
             message = update.message or update.callback_query.message
             await message.reply_text(
-                "Sorry, I couldn't generate your summary right now. Please try again later."
+                "Sorry, I couldn't generate your summary right now. Please try again later.",
+                reply_markup=self._main_menu_markup,
             )
-            await self.send_main_menu(update)
+
+    async def _finish_summary(self, placeholder, recent_logs: Dict[str, List[Dict]]):
+        """Generate the weekly summary and replace the placeholder with it.
+
+        Runs as a background task, so every failure is logged here rather
+        than left on the task.
+        """
+        try:
+            summary = await self._get_summary(recent_logs)
+            text = f"📈 *Your Weekly Skin Health Summary*\n\n{summary}"
+            parse_mode = ParseMode.MARKDOWN
+        except Exception:
+            logger.exception("Error generating summary")
+            text = "Sorry, I couldn't generate your summary right now. Please try again later."
+            parse_mode = None
+        try:
+            await placeholder.edit_text(
+                text, parse_mode=parse_mode, reply_markup=self._main_menu_markup
+            )
+        except Exception:
+            # e.g. the placeholder was deleted or the chat is flood limited
+            logger.exception("Failed to replace the summary placeholder")
+
+    @staticmethod
+    def _summary_key(recent_logs: Dict[str, List[Dict]]) -> str:
+        """Stable digest of the log rows a summary was generated from."""
+        rows = sorted(
+            (kind, str(log.get('id')), str(log.get('logged_at')))
+            for kind, logs in recent_logs.items()
+            for log in logs
+        )
+        return hashlib.blake2b(json.dumps(rows).encode(), digest_size=16).hexdigest()
+
+    async def _get_summary(self, recent_logs: Dict[str, List[Dict]]) -> str:
+        """Return a cached summary for these logs or generate a new one."""
+        key = self._summary_key(recent_logs)
+        cached = self._summary_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.config.summary_cache_ttl:
+            self._summary_cache.move_to_end(key)
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate_summary(recent_logs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield so one caller being cancelled does not cancel the others
+        summary = await asyncio.shield(task)
+
+        self._summary_cache[key] = (time.monotonic(), summary)
+        self._summary_cache.move_to_end(key)
+        if len(self._summary_cache) > self.config.summary_cache_max:
+            self._summary_cache.popitem(last=False)
+        return summary
+
+    async def _generate_summary(self, recent_logs: Dict[str, List[Dict]]) -> str:
+        """Call OpenAI for a summary, bounded by the OpenAI concurrency limit."""
+        async with self._openai_limit:
+            return await self.openai_service.generate_summary(recent_logs)
 
     async def progress_command(self, update: Update, context):
         """Handle /progress command - show user statistics and skin progress."""
         user_id = update.effective_user.id
         try:
-            # Get traditional stats
-            stats = await self.database.get_user_stats(user_id, days=30)
-            
-            # Get skin KPI progress
-            kpi_analyzer = SkinKPIAnalyzer(self.database)
-            skin_summary = await kpi_analyzer.get_progress_summary(user_id, days=30)
+            # Fetch logging stats, skin KPI progress and mood stats together;
+            # they are independent queries. Only the stats are required, the
+            # other sections are left out if their query fails.
+            stats, skin_summary, mood_stats = await asyncio.gather(
+                self.database.get_user_stats(user_id, days=30),
+                self.kpi_analyzer.get_progress_summary(user_id, days=30),
+                self.database.get_mood_stats(user_id, days=30),
+                return_exceptions=True,
+            )
+            if isinstance(stats, BaseException):
+                raise stats
+            skin_summary = self._result_or(skin_summary, None, "skin progress")
+            mood_stats = self._result_or(mood_stats, {}, "mood stats")
             
             # Build the progress message
-            text = "📊 *30-day Progress Overview*\n\n"
-            
-            # Traditional logging stats
-            text += "📝 *Activity Summary:*\n"
-            text += f"• Products logged: {stats.get('product_count', 0)}\n"
-            text += f"• Triggers logged: {stats.get('trigger_count', 0)}\n"
-            text += f"• Symptoms logged: {stats.get('symptom_count', 0)}\n"
-            text += f"• Photos uploaded: {stats.get('photo_count', 0)}\n\n"
-            
+            parts = [PROGRESS_ACTIVITY_TEMPLATE.format_map({
+                'product_count': stats.get('product_count', 0),
+                'trigger_count': stats.get('trigger_count', 0),
+                'symptom_count': stats.get('symptom_count', 0),
+                'photo_count': stats.get('photo_count', 0),
+            })]
+
             # Daily mood/feeling stats
-            mood_stats = await self.database.get_mood_stats(user_id, days=30)
             if mood_stats.get('total_entries', 0) > 0:
-                text += "😊 *Daily Mood Tracking:*\n"
-                text += f"• Check-ins: {mood_stats['total_entries']}\n"
-                text += f"• Average: {mood_stats['average_rating']:.1f}/5.0\n"
-                text += f"• Trend: {mood_stats['trend']}\n"
-                
+                parts.append(PROGRESS_MOOD_TEMPLATE.format_map(mood_stats))
+
                 # Show most common mood
                 mood_dist = mood_stats.get('mood_distribution', {})
                 if mood_dist:
-                    most_common = max(mood_dist.items(), key=lambda x: x[1])
-                    text += f"• Most common: {most_common[0]} ({most_common[1]}x)\n"
-                text += "\n"
-            
+                    most_common = mood_dist.most_common(1)[0]
+                    parts.append(f"• Most common: {most_common[0]} ({most_common[1]}x)\n")
+                parts.append("\n")
+
             # Skin KPI analysis
-            if "message" in skin_summary:
+            if skin_summary is None:
+                pass
+            elif "message" in skin_summary:
                 # Not enough data for skin progress
-                text += "📸 *Skin Progress:*\n"
-                text += f"{skin_summary['message']}\n"
-                text += "_Upload more photos to track your skin improvement!_"
+                parts.append(PROGRESS_SKIN_PENDING_TEMPLATE.format_map(skin_summary))
             else:
                 # We have skin progress data
                 blemish = skin_summary["blemish_improvement"]
-                photos = skin_summary["total_photos"]
-                
                 if blemish["improved"]:
-                    emoji = "✅"
-                    direction = "Improvement"
+                    emoji, direction = "✅", "improvement"
                     change_text = f"↓ {abs(blemish['change']):.1f}%"
                 else:
-                    emoji = "⚠️"
-                    direction = "Increase"
+                    emoji, direction = "⚠️", "increase"
                     change_text = f"↑ {blemish['change']:.1f}%"
-                
-                text += f"🎯 *Skin Progress Analysis:* {emoji}\n"
-                text += f"📸 Photos analyzed: {photos}\n"
-                text += f"📅 Period: {skin_summary['date_range']['start'][:10]} to {skin_summary['date_range']['end'][:10]}\n\n"
-                
-                text += f"🔍 *Blemish Analysis:*\n"
-                text += f"• Current: {blemish['current_percent']:.1f}%\n"
-                text += f"• Initial: {blemish['initial_percent']:.1f}%\n"
-                text += f"• Change: {change_text}\n"
-                text += f"• Average: {skin_summary['average_blemish_percent']:.1f}%\n\n"
-                
-                text += f"📏 *Face Area Metrics:*\n"
-                text += f"• Current: {skin_summary['face_area']['current_px']:,} pixels\n"
-                text += f"• Initial: {skin_summary['face_area']['initial_px']:,} pixels\n\n"
-                
-                text += f"{emoji} *Overall {direction.lower()}* detected in skin condition!"
+
+                parts.append(PROGRESS_SKIN_TEMPLATE.format_map({
+                    **skin_summary["date_range"],
+                    **blemish,
+                    'total_photos': skin_summary["total_photos"],
+                    'average_blemish_percent': skin_summary['average_blemish_percent'],
+                    'current_px': skin_summary['face_area']['current_px'],
+                    'initial_px': skin_summary['face_area']['initial_px'],
+                    'emoji': emoji,
+                    'direction': direction,
+                    'change_text': change_text,
+                }))
+
+            text = "".join(parts)
             
             message = update.message or update.callback_query.message
-            await message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
-            await self.send_main_menu(update)
+            await message.reply_text(
+                text, parse_mode=ParseMode.MARKDOWN, reply_markup=self._main_menu_markup
+            )
             
         except Exception as e:
             logger.exception("Error getting progress")
             message = update.message or update.callback_query.message
-            await message.reply_text("Sorry, I couldn't load your progress right now.")
-            await self.send_main_menu(update)
+            await message.reply_text(
+                "Sorry, I couldn't load your progress right now.",
+                reply_markup=self._main_menu_markup,
+            )
 
     async def skin_command(self, update: Update, context):
         """Handle /skin command - show detailed skin analysis and trends."""
         user_id = update.effective_user.id
         try:
-            kpi_analyzer = SkinKPIAnalyzer(self.database)
             
-            # Get recent KPIs
-            recent_kpis = await kpi_analyzer.get_user_kpis(user_id, days=30)
+            # Recent KPIs, progress summary and weekly trends are independent
+            # queries; fetch them together. Only the KPIs are required.
+            recent_kpis, skin_summary, weekly_trends = await asyncio.gather(
+                self.kpi_analyzer.get_user_kpis(user_id, days=30),
+                self.kpi_analyzer.get_progress_summary(user_id, days=30),
+                self.kpi_analyzer.get_weekly_trends(user_id, weeks=4),
+                return_exceptions=True,
+            )
+            if isinstance(recent_kpis, BaseException):
+                raise recent_kpis
+            skin_summary = self._result_or(skin_summary, None, "skin progress")
+            weekly_trends = self._result_or(weekly_trends, [], "weekly trends")
             
             if not recent_kpis:
-                text = "📸 *Skin Analysis*\n\n"
-                text += "No skin photos found in the last 30 days.\n"
-                text += "Upload a photo to start tracking your skin health!"
+                text = (
+                    "📸 *Skin Analysis*\n\n"
+                    "No skin photos found in the last 30 days.\n"
+                    "Upload a photo to start tracking your skin health!"
+                )
                 
                 message = update.message or update.callback_query.message
-                await message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
-                await self.send_main_menu(update)
+                await message.reply_text(
+                    text, parse_mode=ParseMode.MARKDOWN, reply_markup=self._main_menu_markup
+                )
                 return
             
-            # Get detailed analysis
-            skin_summary = await kpi_analyzer.get_progress_summary(user_id, days=30)
-            weekly_trends = await kpi_analyzer.get_weekly_trends(user_id, weeks=4)
-            
-            text = "🔬 *Detailed Skin Analysis*\n\n"
-            
             # Latest photo metrics
-            latest = recent_kpis[0]  # Most recent photo
-            text += f"📸 *Latest Photo Analysis:*\n"
-            text += f"• Date: {latest['timestamp'][:10]}\n"
-            text += f"• Face Area: {latest['face_area_px']:,} pixels\n"
-            text += f"• Blemish Area: {latest['blemish_area_px']:,} pixels\n"
-            text += f"• Blemish Percentage: {latest['percent_blemished']:.1f}%\n\n"
-            
+            parts = [SKIN_LATEST_TEMPLATE.format_map(recent_kpis[0])]  # Most recent photo
+
             # Progress summary
-            if "message" not in skin_summary:
+            if skin_summary is not None and "message" not in skin_summary:
                 blemish = skin_summary["blemish_improvement"]
-                trend_emoji = "📈" if blemish["improved"] else "📉"
-                
-                text += f"{trend_emoji} *30-Day Progress:*\n"
-                text += f"• Photos analyzed: {skin_summary['total_photos']}\n"
-                text += f"• Average blemish %: {skin_summary['average_blemish_percent']:.1f}%\n"
-                text += f"• Change: {blemish['change']:+.1f}%\n\n"
-            
+                parts.append(SKIN_PROGRESS_TEMPLATE.format_map({
+                    'trend_emoji': "📈" if blemish["improved"] else "📉",
+                    'total_photos': skin_summary['total_photos'],
+                    'average_blemish_percent': skin_summary['average_blemish_percent'],
+                    'change': blemish['change'],
+                }))
+
             # Weekly trends
             if weekly_trends:
-                text += "📊 *Weekly Trends:*\n"
-                for trend in weekly_trends[-3:]:  # Last 3 weeks
-                    week_date = trend['week_start']
-                    avg_blemish = trend['avg_blemish_percent']
-                    photo_count = trend['photo_count']
-                    text += f"• Week of {week_date}: {avg_blemish:.1f}% ({photo_count} photos)\n"
-                text += "\n"
-            
-            text += "💡 *Tip:* Upload photos regularly to track your skin improvement over time!"
+                parts.append("📊 *Weekly Trends:*\n")
+                parts += [SKIN_WEEK_TEMPLATE.format_map(trend) for trend in weekly_trends[-3:]]  # Last 3 weeks
+                parts.append("\n")
+
+            parts.append("💡 *Tip:* Upload photos regularly to track your skin improvement over time!")
+            text = "".join(parts)
             
             message = update.message or update.callback_query.message
-            await message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
-            await self.send_main_menu(update)
+            await message.reply_text(
+                text, parse_mode=ParseMode.MARKDOWN, reply_markup=self._main_menu_markup
+            )
             
         except Exception as e:
             logger.exception("Error getting skin analysis")
             message = update.message or update.callback_query.message
-            await message.reply_text("Sorry, I couldn't load your skin analysis right now.")
-            await self.send_main_menu(update)
+            await message.reply_text(
+                "Sorry, I couldn't load your skin analysis right now.",
+                reply_markup=self._main_menu_markup,
+            )
+
+    async def _show_settings(self, update: Update, context, notice: str = ""):
+        """Display settings including existing conditions.
 
-    async def _show_settings(self, update: Update, context):
-        """Display settings including existing conditions."""
+        With a Markdown ``notice`` (the result of a settings change made from
+        a button) the button's message is edited to show the notice above the
+        settings, instead of sending settings as a new message.
+        """
         user_id = update.effective_user.id
-        conditions = await self.database.get_conditions(user_id)
-        if conditions:
-            cond_lines = [
-                f"• {c['name']} ({c['condition_type']})" for c in conditions
-            ]
-            condition_text = "\n".join(cond_lines)
-        else:
-            condition_text = "No conditions set."
+        # Conditions and the reminder setting are independent reads
+        conditions, user = await asyncio.gather(
+            self.database.get_conditions(user_id),
+            self.database.get_user_by_telegram_id(user_id),
+        )
+        condition_text = "\n".join(
+            f"• {c['name']} ({c['condition_type']})" for c in conditions
+        ) if conditions else "No conditions set."
 
-        # Get current reminder settings
-        user = await self.database.get_user_by_telegram_id(user_id)
         reminder_time = user.get('reminder_time', '09:00') if user else '09:00'
         
         keyboard = [
@@ -565,46 +1520,32 @@ Let's get you set up for success! 🚀"""
             [InlineKeyboardButton("🗑️ Delete Data", callback_data="settings_delete_data")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        message = update.message or update.callback_query.message
-        await message.reply_text(
-            f"⚙️ *Settings*\n\n"
+        text = (
+            f"{notice}⚙️ *Settings*\n\n"
             f"*Current Reminder:* {reminder_time}\n\n"
-            f"*Your Conditions:*\n{condition_text}",
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup,
-        )
-
-    async def settings_command(self, update: Update, context):
-        """Handle /settings command."""
-        await self._show_settings(update, context)
-
-    async def _show_reminder_settings(self, query, context):
-        """Show reminder time settings."""
-        keyboard = [
-            [InlineKeyboardButton("🌅 09:00", callback_data="set_reminder_09:00")],
-            [InlineKeyboardButton("🏙️ 12:00", callback_data="set_reminder_12:00")],
-            [InlineKeyboardButton("🌆 18:00", callback_data="set_reminder_18:00")],
-            [InlineKeyboardButton("🌙 21:00", callback_data="set_reminder_21:00")],
-            [InlineKeyboardButton("❌ Disable", callback_data="set_reminder_disable")],
-            [InlineKeyboardButton("⬅️ Back", callback_data="settings_back")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(
-            "⏰ *Reminder Settings*\n\nChoose when you'd like to receive daily skin check-in reminders:",
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            f"*Your Conditions:*\n{condition_text}"
         )
+        if notice and update.callback_query:
+            self._send(update.callback_query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+            return
+        message = update.message or update.callback_query.message
+        await message.reply_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+
+    async def settings_command(self, update: Update, context):
+        """Handle /settings command."""
+        await self._show_settings(update, context)
 
-    async def _show_product_management(self, query, context, user_id):
-        """Show product management options."""
+    async def _show_product_management(self, query, context, user_id, notice: str = ""):
+        """Show product management options, optionally headed by a Markdown ``notice``."""
         all_products = await self.database.get_products(user_id)
         
         # Filter to only show user-specific products (not global ones)
         products = [p for p in all_products if not p.get('is_global', True)]
         
         if not products:
-            await query.edit_message_text(
-                "🏷️ *Product Management*\n\nNo custom products found. Products are automatically added when you log them.\n\n"
+            self._send(
+                query,
+                f"{notice}🏷️ *Product Management*\n\nNo custom products found. Products are automatically added when you log them.\n\n"
                 "Use the main menu to log products, and they'll appear here for management.",
                 parse_mode=ParseMode.MARKDOWN,
                 reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="settings_back")]])
@@ -615,14 +1556,15 @@ Let's get you set up for success! 🚀"""
         for product in products[:8]:  # Limit to 8 products to avoid button limit
             keyboard.append([InlineKeyboardButton(
                 f"✏️ {product['name']}", 
-                callback_data=f"edit_product_{product['name'].replace(' ', '_')}"
+                callback_data=f"edit_product_{product['name'].translate(_SLUG)}"
             )])
         
         keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="settings_back")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
-            f"🏷️ *Product Management*\n\nSelect a product to rename or delete ({len(products)} custom products):",
+        self._send(
+            query,
+            f"{notice}🏷️ *Product Management*\n\nSelect a product to rename or delete ({len(products)} custom products):",
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
@@ -632,265 +1574,41 @@ Let's get you set up for success! 🚀"""
         # Get data summary
         summary = await self.database.get_data_summary(user_id)
         
-        text = "🗑️ *Delete Data*\n\n"
-        text += "⚠️ *Warning: This action cannot be undone!*\n\n"
-        text += "*Your current data:*\n"
-        
-        data_labels = {
-            'photos': '📸 Photos',
-            'products': '🧴 Product logs', 
-            'triggers': '⚠️ Trigger logs',
-            'symptoms': '🏥 Symptom logs',
-            'moods': '😊 Daily moods',
-            'kpis': '📊 Skin analysis'
-        }
-        
-        for data_type, label in data_labels.items():
-            count = summary.get(data_type, 0)
-            text += f"• {label}: {count}\n"
-        
-        keyboard = [
-            [InlineKeyboardButton("📸 Delete Photos Only", callback_data="delete_data_photos")],
-            [InlineKeyboardButton("📝 Delete Logs Only", callback_data="delete_data_logs")],
-            [InlineKeyboardButton("🗑️ Delete Everything", callback_data="delete_data_all")],
-            [InlineKeyboardButton("⬅️ Back", callback_data="settings_back")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        text = (
+            "🗑️ *Delete Data*\n\n"
+            "⚠️ *Warning: This action cannot be undone!*\n\n"
+            "*Your current data:*\n"
+        ) + "".join(
+            f"• {label}: {summary.get(data_type, 0)}\n" for data_type, label in DATA_LABELS
+        )
         
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=self._delete_data_markup)
 
     async def help_command(self, update: Update, context):
         """Handle /help command - show comprehensive help."""
-        help_text = """📚 *SkinTrack Help Guide*
-
-🎯 **Core Features:**
-
-📸 **Photo Check-ins**
-• Upload clear, well-lit photos
-• Try to use consistent lighting & angle
-• AI analyzes progress over time
-
-📝 **Daily Logging**  
-• Track symptoms (severity 1-5)
-• Note triggers affecting your skin
-• Record product usage
-
-🎯 **Area Tracking**
-• Focus on specific skin areas
-• Compare improvement across zones
-• Get targeted insights
-
-🧴 **Product Management**
-• Test what works for your skin
-• Track product effectiveness
-• Get usage recommendations
-
-📊 **Progress & Insights**
-• View your improvement timeline
-• Get AI-powered weekly reports
-• Identify patterns and trends
-
-*🏆 Pro Tips:*
-• Log daily for best results
-• Take photos in similar conditions
-• Be consistent with timing
-• Track triggers immediately
-
-*📱 Quick Commands:*
-/start - Main menu
-/log - Quick logging
-/progress - View improvements  
-/help - This guide
-
-Questions? Just ask! 💬"""
-        
-        keyboard = [
-            [InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")],
-            [InlineKeyboardButton("🚀 Quick Start Guide", callback_data="quick_start_guide")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
-            help_text, 
+            HELP_TEXT,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            reply_markup=self._help_markup
         )
 
     # ========== NEW ENHANCED FEATURES ==========
 
-    async def _handle_onboarding(self, query, context):
-        """Handle onboarding flow for new users."""
-        data = query.data
-        
-        if data == "onboarding_start":
-            await self._show_onboarding_step_1(query, context)
-        elif data == "onboarding_learn":
-            await self._show_onboarding_learn_more(query, context)
-        elif data == "onboarding_reminder":
-            await self._show_onboarding_reminder_setup(query, context)
-        elif data == "onboarding_areas":
-            await self._show_onboarding_area_setup(query, context)
-        elif data == "onboarding_complete":
-            await self._complete_onboarding(query, context)
-
-    async def _show_onboarding_step_1(self, query, context):
-        """Step 1: Explain the tracking process."""
-        text = """🎯 *Your Skin Journey Starts Here*
-
-*Here's how SkinTrack works:*
-
-🔬 **Week 1-2: Baseline**
-• Upload 2-3 photos to establish your starting point
-• Log any current products you're using
-• Note triggers as they happen
-
-📈 **Week 3+: Track Progress**  
-• Continue daily logging
-• Watch your progress timeline grow
-• Get weekly insights and recommendations
-
-💡 **The Secret:** Consistency beats perfection! Even 30 seconds a day makes a huge difference.
-
-Ready to set up your tracking preferences?"""
-
-        keyboard = [
-            [InlineKeyboardButton("✅ Yes, Let's Set Up!", callback_data="onboarding_reminder")],
-            [InlineKeyboardButton("🔄 Tell Me More", callback_data="onboarding_learn")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
-
-    async def _show_onboarding_learn_more(self, query, context):
-        """Show detailed explanation of features."""
-        text = """🧠 *Why SkinTrack Works*
-
-**🔬 Smart Analysis**
-• AI compares your photos over time
-• Tracks blemish reduction, texture improvement
-• Identifies patterns you might miss
-
-**📊 Data-Driven Insights**  
-• Correlates products with skin improvements
-• Identifies your personal trigger patterns
-• Provides actionable recommendations
-
-**🎯 Focused Tracking**
-• Track specific problem areas
-• See progress where it matters most
-• Get targeted treatment suggestions
-
-**💡 Personalized Reports**
-• Weekly summaries of your progress
-• Product effectiveness analysis
-• Next steps for improvement
-
-*Real Results:* Users see 40% better skin improvement when tracking consistently vs. guessing! 📈"""
-
-        keyboard = [
-            [InlineKeyboardButton("🚀 I'm Ready to Start!", callback_data="onboarding_reminder")],
-            [InlineKeyboardButton("📱 Quick Demo", callback_data="show_main_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
-
-    async def _show_onboarding_reminder_setup(self, query, context):
-        """Set up daily reminder during onboarding."""
-        text = """⏰ *Daily Check-in Reminder*
-
-*When would you like your daily skin check-in reminder?*
-
-Choose a time when you typically:
-• Have good lighting for photos
-• Can spend 1-2 minutes logging
-• Are in your usual environment
-
-*📱 You'll get a gentle reminder to:*
-• Rate how your skin feels today
-• Log any new products or triggers  
-• Take a quick progress photo"""
-
-        keyboard = [
-            [
-                InlineKeyboardButton("🌅 Morning (9 AM)", callback_data="set_reminder_09:00"),
-                InlineKeyboardButton("🏙️ Midday (12 PM)", callback_data="set_reminder_12:00")
-            ],
-            [
-                InlineKeyboardButton("🌆 Evening (6 PM)", callback_data="set_reminder_18:00"),
-                InlineKeyboardButton("🌙 Night (9 PM)", callback_data="set_reminder_21:00")
-            ],
-            [InlineKeyboardButton("⏭️ Skip for Now", callback_data="onboarding_areas")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
-
-    async def _show_onboarding_area_setup(self, query, context):
-        """Set up tracking areas during onboarding."""
-        text = """🎯 *Focus Areas (Optional)*
-
-*Want to track specific problem areas?*
-
-You can focus on particular areas like:
-• Forehead acne
-• Cheek redness  
-• T-zone oiliness
-• Chin breakouts
-
-*Benefits:*
-• More targeted insights
-• Compare improvement across areas
-• Specialized recommendations
-
-*You can always add or change these later in Settings.*"""
-
-        keyboard = [
-            [InlineKeyboardButton("🎯 Set Up Areas", callback_data="area_setup_new")],
-            [InlineKeyboardButton("⏭️ Skip - Track Everything", callback_data="onboarding_complete")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
-
     async def _complete_onboarding(self, query, context):
         """Complete onboarding flow."""
         user_id = query.from_user.id
         
         # Mark user as onboarded
         await self.database.update_user_onboarding_status(user_id, True)
-        
-        text = """🎉 *You're All Set!*
-
-Welcome to your skin health journey! Here's what to do next:
-
-**📸 Take Your First Photo**
-• Upload a baseline photo to start tracking
-• Use good lighting and a consistent angle
-
-**📝 Start Daily Logging**  
-• Rate how your skin feels today
-• Log any products you're currently using
-
-**🔍 Explore Your Tools**
-• Check out the Progress section
-• Review help for detailed guides
-
-*🏆 Pro Tip:* The first week is about establishing your baseline. Don't worry about perfect photos - consistency matters more!
-
-Ready to start your journey?"""
 
-        keyboard = [
-            [InlineKeyboardButton("📸 Take First Photo", callback_data="quick_photo")],
-            [InlineKeyboardButton("📝 Daily Check-in", callback_data="daily_checkin")],
-            [InlineKeyboardButton("🏠 Explore Menu", callback_data="show_main_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(
+            query,
+            ONBOARDING_COMPLETE_TEXT, parse_mode=ParseMode.MARKDOWN, reply_markup=self._onboarding_complete_markup
+        )
 
-    async def _handle_daily_checkin(self, query, context):
+    async def _handle_daily_checkin(self, update: Update, context):
         """Handle daily check-in flow."""
+        query = update.callback_query
         user_id = query.from_user.id
         
         # Get today's existing logs to show progress
@@ -902,18 +1620,20 @@ Ready to start your journey?"""
         has_symptoms = today_logs.get('symptom_count', 0) > 0
         has_products = today_logs.get('product_count', 0) > 0
         
-        text = "📝 *Daily Check-in*\n\n"
-        text += "*Today's Progress:*\n"
-        text += f"📸 Photo: {'✅' if has_photo else '⭕'}\n" 
-        text += f"😊 Mood: {'✅' if has_mood else '⭕'}\n"
-        text += f"📊 Symptoms: {'✅' if has_symptoms else '⭕'}\n"
-        text += f"🧴 Products: {'✅' if has_products else '⭕'}\n\n"
-        
-        if has_photo and has_mood and has_symptoms:
-            text += "🎉 *Great job!* You've completed today's check-in.\n\n"
-            text += "Want to add anything else?"
-        else:
-            text += "*What would you like to log today?*"
+        done = has_photo and has_mood and has_symptoms
+        text = (
+            "📝 *Daily Check-in*\n\n"
+            "*Today's Progress:*\n"
+            f"📸 Photo: {'✅' if has_photo else '⭕'}\n"
+            f"😊 Mood: {'✅' if has_mood else '⭕'}\n"
+            f"📊 Symptoms: {'✅' if has_symptoms else '⭕'}\n"
+            f"🧴 Products: {'✅' if has_products else '⭕'}\n\n"
+            + (
+                "🎉 *Great job!* You've completed today's check-in.\n\nWant to add anything else?"
+                if done
+                else "*What would you like to log today?*"
+            )
+        )
 
         keyboard = []
         
@@ -929,16 +1649,17 @@ Ready to start your journey?"""
         keyboard.append([InlineKeyboardButton("🧴 Add Products", callback_data="checkin_products")])
         keyboard.append([InlineKeyboardButton("⚠️ Note Triggers", callback_data="checkin_triggers")])
         
-        if has_photo and has_mood and has_symptoms:
+        if done:
             keyboard.append([InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")])
         else:
             keyboard.append([InlineKeyboardButton("⏭️ Finish Later", callback_data="show_main_menu")])
 
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
 
-    async def _handle_area_management(self, query, context):
+    async def _handle_area_management(self, update: Update, context):
         """Handle area tracking management."""
+        query = update.callback_query
         user_id = query.from_user.id
         data = query.data
         
@@ -947,12 +1668,12 @@ Ready to start your journey?"""
         elif data == "area_setup_new":
             await self._show_area_setup(query, context)
         elif data.startswith("area_select_"):
-            area_name = data.replace("area_select_", "").replace("_", " ")
+            area_name = data.removeprefix("area_select_").translate(_UNSLUG)
             await self._toggle_area_selection(query, context, area_name)
         elif data == "area_save_selection":
             await self._save_area_selection(query, context, user_id)
         elif data.startswith("area_view_"):
-            area_name = data.replace("area_view_", "").replace("_", " ")
+            area_name = data.removeprefix("area_view_").translate(_UNSLUG)
             await self._show_area_details(query, context, user_id, area_name)
 
     async def _show_area_overview(self, query, context, user_id):
@@ -982,26 +1703,25 @@ You can track specific problem areas to get more targeted insights:
                 [InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")]
             ]
         else:
-            text = f"🎯 *Your Tracked Areas* ({len(areas)})\n\n"
-            
-            for area in areas:
-                recent_logs = area.get('recent_log_count', 0)
-                text += f"• **{area['name']}** - {recent_logs} recent logs\n"
-            
-            text += "\n*Select an area to view detailed progress:*"
+            parts = [f"🎯 *Your Tracked Areas* ({len(areas)})\n"]
+            parts.extend(
+                f"• **{area['name']}** - {area.get('recent_log_count', 0)} recent logs" for area in areas
+            )
+            parts.append("\n*Select an area to view detailed progress:*")
+            text = "\n".join(parts)
             
             keyboard = []
             for area in areas:
                 keyboard.append([InlineKeyboardButton(
                     f"📊 {area['name']}", 
-                    callback_data=f"area_view_{area['name'].replace(' ', '_')}"
+                    callback_data=f"area_view_{area['name'].translate(_SLUG)}"
                 )])
             
             keyboard.append([InlineKeyboardButton("➕ Add New Area", callback_data="area_setup_new")])
             keyboard.append([InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")])
 
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
 
     async def _show_area_setup(self, query, context):
         """Show area setup with common options."""
@@ -1011,56 +1731,39 @@ You can track specific problem areas to get more targeted insights:
 
 Choose areas where you want detailed progress tracking and targeted insights."""
 
-        context.user_data['selected_areas'] = context.user_data.get('selected_areas', [])
-        selected = context.user_data['selected_areas']
-        
-        common_areas = [
-            "Forehead", "Left Cheek", "Right Cheek", "Nose", 
-            "T-Zone", "Chin", "Jawline", "Under Eyes"
-        ]
+        selected = context.user_data.setdefault('selected_areas', {})
         
         keyboard = []
-        for area in common_areas:
+        for area in COMMON_AREAS:
             prefix = "✅ " if area in selected else ""
             keyboard.append([InlineKeyboardButton(
                 f"{prefix}{area}",
-                callback_data=f"area_select_{area.replace(' ', '_')}"
+                callback_data=f"area_select_{area.translate(_SLUG)}"
             )])
         
         keyboard.append([InlineKeyboardButton("💾 Save Selection", callback_data="area_save_selection")])
         keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="area_management")])
 
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
 
     async def _toggle_area_selection(self, query, context, area_name):
         """Toggle area selection during setup."""
-        selected = context.user_data.get('selected_areas', [])
-        
-        if area_name in selected:
-            selected.remove(area_name)
-        else:
-            selected.append(area_name)
-        
-        context.user_data['selected_areas'] = selected
+        _toggle_selection(context.user_data.setdefault('selected_areas', {}), area_name)
         
         # Refresh the area setup view
         await self._show_area_setup(query, context)
 
     async def _save_area_selection(self, query, context, user_id):
         """Save selected areas to database."""
-        selected = context.user_data.get('selected_areas', [])
+        selected = context.user_data.get('selected_areas', {})
         
         if not selected:
             await query.answer("Please select at least one area to track.")
             return
         
         # Save areas to database
-        success_count = 0
-        for area_name in selected:
-            success = await self.database.create_user_area(user_id, area_name)
-            if success:
-                success_count += 1
+        success_count = await self.database.create_user_areas(user_id, list(selected))
         
         # Clear selection from context
         context.user_data.pop('selected_areas', None)
@@ -1083,7 +1786,18 @@ Successfully set up {success_count} tracking areas:
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+
+    def _static_screen(
+        self,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        parse_mode: Optional[str] = ParseMode.MARKDOWN,
+    ) -> Callable:
+        """Return a callback action that edits the message to a fixed screen."""
+        async def show(update: Update, context):
+            self._send(update.callback_query, text, parse_mode=parse_mode, reply_markup=reply_markup)
+        return show
 
     async def handle_callback(self, update: Update, context):
         """Handle inline keyboard button callbacks."""
@@ -1091,696 +1805,681 @@ Successfully set up {success_count} tracking areas:
         await query.answer()
 
         data = query.data
-        user_id = update.effective_user.id
-
-        # ========== CORE NAVIGATION ==========
-        if data == "show_main_menu":
-            await self.send_main_menu(update)
-            return
-
-        # ========== ONBOARDING FLOW ==========
-        if data.startswith("onboarding_"):
-            await self._handle_onboarding(query, context)
-            return
-
-        # ========== DAILY CHECK-IN FLOW ==========
-        if data == "daily_checkin":
-            await self._handle_daily_checkin(query, context)
-            return
-        
-        if data.startswith("checkin_"):
-            await self._handle_checkin_actions(query, context)
+        action = self._callback_actions.get(data)
+        if action is not None:
+            await action(update, context)
             return
 
-        # ========== QUICK ACTIONS ==========
-        if data == "quick_photo":
-            await query.edit_message_text(
-                "📸 *Quick Photo Check-in*\n\n"
-                "Upload a clear, well-lit photo of your skin.\n\n"
-                "*💡 Tips:*\n"
-                "• Use consistent lighting\n"
-                "• Same angle as previous photos\n"
-                "• Clean skin (no makeup)\n\n"
-                "Ready? Upload your photo now! 📷",
-                parse_mode=ParseMode.MARKDOWN
-            )
-            return
+        for prefix, route in self._callback_routes.items():
+            if data.startswith(prefix):
+                await route(update, context)
+                return
 
-        # ========== AREA MANAGEMENT ==========
-        if data.startswith("area_"):
-            await self._handle_area_management(query, context)
-            return
+    async def _start_trigger_log(self, update: Update, context):
+        """Start a fresh trigger selection."""
+        query = update.callback_query
+        context.user_data["selected_triggers"] = {}
+        await self._show_trigger_options(query, context)
 
-        # ========== MAIN MENU OPTIONS ==========
-        if data.startswith("menu_"):
-            if data == "menu_log":
-                await self.log_command(update, context)
-            elif data == "menu_progress":
-                await self.progress_command(update, context)
-            elif data == "menu_summary":
-                await self.summary_command(update, context)
-            elif data == "menu_settings":
-                await self._show_settings(update, context)
-            elif data == "menu_help":
-                await self.help_command(update, context)
-            return
+    async def _start_symptom_log(self, update: Update, context):
+        """Start a fresh symptom selection."""
+        query = update.callback_query
+        context.user_data["selected_symptoms"] = {}
+        await self._show_symptom_options(query, context)
 
-        # ========== PRODUCT MANAGEMENT ==========
-        if data == "area_products":
-            await self._show_product_management(query, context, user_id)
-            return
+    async def _prompt_condition_name(self, update: Update, context):
+        """Ask for the name of a new condition."""
+        query = update.callback_query
+        context.user_data["awaiting"] = "condition_name"
+        self._send(query, "Please enter the condition name:")
 
-        # ========== EXISTING FLOWS (LEGACY SUPPORT) ==========
-        if data == "log_photo":
-            await query.edit_message_text(
-                "📷 Please upload a photo of your skin. Make sure it's well-lit and clear!"
+    async def _handle_condition_type(self, update: Update, context):
+        """Save the pending condition with the chosen type."""
+        query = update.callback_query
+        data = query.data
+        user_id = update.effective_user.id
+        condition_type = data.removeprefix("condition_type_")
+        name = context.user_data.get("new_condition_name")
+        if name:
+            await self.database.add_condition(user_id, name, condition_type)
+            context.user_data.pop("new_condition_name", None)
+            await self._show_settings(
+                update,
+                context,
+                f"✅ Condition added: {escape_markdown(name)} ({escape_markdown(condition_type)})\n\n",
             )
-            return
-        elif data == "log_product":
-            await self._show_product_options(query)
-            return
-        elif data == "log_trigger":
-            context.user_data["selected_triggers"] = []
-            await self._show_trigger_options(query, context)
-            return
-        elif data == "log_symptom":
-            context.user_data["selected_symptoms"] = []
-            await self._show_symptom_options(query, context)
-            return
+        else:
+            self._send(query, "Condition name missing.")
 
-        if data == "settings_add_condition":
-            context.user_data["awaiting_condition_name"] = True
-            await query.edit_message_text("Please enter the condition name:")
-            return
+    async def _handle_product_choice(self, update: Update, context):
+        """Log a product button, or ask for a custom one."""
+        query = update.callback_query
+        data = query.data
+        user_id = update.effective_user.id
+        product_name = self._callback_names.get(data)
+        if product_name is None:
+            product_name = data.removeprefix("product_").translate(_UNSLUG)
+        if product_name == "Other":
+            context.user_data["awaiting"] = "custom_product"
+            self._send(query, "Please type your custom product:")
+        else:
+            await self._log_product(query, user_id, product_name)
 
-        if data == "settings_reminder":
-            # Show reminder time options
-            await self._show_reminder_settings(query, context)
-            return
+    async def _toggle_trigger(self, update: Update, context):
+        """Toggle a trigger in the current selection."""
+        query = update.callback_query
+        data = query.data
+        key = data.removeprefix("trigger_toggle_")
+        slugs = context.user_data.get("trigger_slugs", {})
+        trigger = slugs.get(key) or key.replace('_', ' ')
+        if trigger == "Other":
+            context.user_data["awaiting"] = "custom_trigger"
+            self._cancel_scheduled_edit(query)
+            self._send(query, "Please type your custom trigger:")
+        else:
+            _toggle_selection(context.user_data.setdefault("selected_triggers", {}), trigger)
+            await self._show_trigger_options(query, context, refresh=False)
+
+    async def _submit_triggers(self, update: Update, context):
+        """Log every selected trigger."""
+        query = update.callback_query
+        user_id = update.effective_user.id
+        selected = context.user_data.get("selected_triggers", {})
+        if selected:
+            self._cancel_scheduled_edit(query)
+            try:
+                await self.database.log_triggers(user_id, list(selected))
+            except Exception:
+                logger.exception("Error logging triggers")
+                self._send(
+                    query,
+                    "Sorry, there was an error logging your triggers.",
+                    reply_markup=self._main_menu_markup,
+                )
+                return
+            context.user_data["selected_triggers"] = {}
+            self._send(
+                query,
+                f"✅ Logged triggers: {', '.join(selected)}",
+                reply_markup=self._main_menu_markup,
+            )
+        else:
+            await query.answer("No triggers selected", show_alert=True)
 
-        if data == "settings_products":
-            # Show product management options
-            await self._show_product_management(query, context, user_id)
-            return
+    async def _toggle_symptom(self, update: Update, context):
+        """Toggle a symptom in the current selection."""
+        query = update.callback_query
+        data = query.data
+        symptom = self._callback_names.get(data)
+        if symptom is None:
+            symptom = data.removeprefix("symptom_toggle_").translate(_UNSLUG)
+        _toggle_selection(context.user_data.setdefault("selected_symptoms", {}), symptom)
+        await self._show_symptom_options(query, context)
+
+    async def _handle_reminder_time(self, update: Update, context):
+        """Set the daily reminder from a ``reminder_*`` button."""
+        query = update.callback_query
+        data = query.data
+        user_id = update.effective_user.id
+        time_str = data.split("_", 1)[1]
+        await self.database.update_user_reminder(user_id, time_str)
+        if self.scheduler:
+            self.scheduler.schedule_daily_reminder(user_id, time_str)
+        self._send(query, f"✅ Daily reminder set for {time_str}")
+
+    async def _handle_mood_rate(self, update: Update, context):
+        """Log a mood rating from the daily check-in."""
+        await self._log_mood_rating(
+            update,
+            update.callback_query.data.removeprefix("mood_rate_"),
+            MOOD_LABELS,
+            MOOD_EMOJI,
+            MOOD_LOGGED_TEMPLATE,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=self._mood_logged_markup,
+        )
 
-        if data == "settings_delete_data":
-            # Show data deletion options
-            await self._show_delete_data_options(query, context, user_id)
-            return
+    async def _handle_rating(self, update: Update, context):
+        """Log a mood rating from a reminder message."""
+        await self._log_mood_rating(
+            update,
+            update.callback_query.data.removeprefix("rating_"),
+            RATING_LABELS,
+            RATING_EMOJI,
+            RATING_LOGGED_TEMPLATE,
+        )
 
-        if data.startswith("condition_type_"):
-            condition_type = data.replace("condition_type_", "")
-            name = context.user_data.get("new_condition_name")
-            if name:
-                await self.database.add_condition(user_id, name, condition_type)
-                await query.edit_message_text(
-                    f"✅ Condition added: {name} ({condition_type})"
-                )
-                context.user_data.pop("new_condition_name", None)
-                context.user_data.pop("awaiting_condition_type", None)
-                await self._show_settings(update, context)
-            else:
-                await query.edit_message_text("Condition name missing.")
+    async def _log_mood_rating(
+        self,
+        update: Update,
+        rating: str,
+        labels: tuple,
+        emojis: tuple,
+        template: str,
+        parse_mode: Optional[str] = None,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ):
+        """Log a 1-5 rating and confirm it with ``template``.
+
+        ``labels`` and ``emojis`` are indexed by rating; the label is what
+        gets stored as the mood description.
+        """
+        rating_num = int(rating)
+        if not 1 <= rating_num <= 5:
             return
+        label = labels[rating_num]
+        query = update.callback_query
+        if await self.database.log_daily_mood(update.effective_user.id, rating_num, label):
+            self._send(
+                query,
+                template.format(emoji=emojis[rating_num], label=label),
+                parse_mode=parse_mode,
+                reply_markup=reply_markup,
+            )
+        else:
+            self._send(query, MOOD_LOG_ERROR_TEXT)
 
-        if data.startswith("product_"):
-            product_name = data.replace("product_", "").replace("_", " ")
-            if product_name == "Other":
-                context.user_data["awaiting_custom_product"] = True
-                await query.edit_message_text("Please type your custom product:")
-            else:
-                await self._log_product(query, user_id, product_name)
-                await self.send_main_menu(update)
-            return
+    async def _handle_edit_product(self, update: Update, context):
+        """Show rename/delete options for a product."""
+        query = update.callback_query
+        data = query.data
+        product_name = data.removeprefix("edit_product_").translate(_UNSLUG)
+        context.user_data["editing_product"] = product_name
+        keyboard = [
+            [InlineKeyboardButton("✏️ Rename", callback_data=f"rename_product_{product_name.translate(_SLUG)}")],
+            [InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_product_{product_name.translate(_SLUG)}")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="settings_products")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        self._send(
+            query,
+            f"🏷️ *Product: {product_name}*\n\nWhat would you like to do?",
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=reply_markup
+        )
 
-        if data.startswith("trigger_toggle_"):
-            key = data.replace("trigger_toggle_", "")
-            available = context.user_data.get("available_triggers", [])
-            trigger = next((t for t in available if t.lower().replace(' ', '_') == key), key.replace('_', ' '))
-            if trigger == "Other":
-                context.user_data["awaiting_custom_trigger"] = True
-                await query.edit_message_text("Please type your custom trigger:")
-            else:
-                selected = context.user_data.setdefault("selected_triggers", [])
-                if trigger in selected:
-                    selected.remove(trigger)
-                else:
-                    selected.append(trigger)
-                await self._show_trigger_options(query, context)
-            return
-        elif data == "trigger_submit":
-            selected = context.user_data.get("selected_triggers", [])
-            if selected:
-                for t in selected:
-                    await self.database.log_trigger(user_id, t)
-                context.user_data["selected_triggers"] = []
-                await query.edit_message_text(f"✅ Logged triggers: {', '.join(selected)}")
-                await self.send_main_menu(update)
-            else:
-                await query.answer("No triggers selected", show_alert=True)
-            return
+    async def _handle_rename_product(self, update: Update, context):
+        """Ask for the new name of a product."""
+        query = update.callback_query
+        data = query.data
+        product_name = data.removeprefix("rename_product_").translate(_UNSLUG)
+        context.user_data["renaming_product"] = product_name
+        context.user_data["awaiting"] = "new_product_name"
+        self._send(query, f"✏️ Enter new name for '{product_name}':")
 
-        if data.startswith("symptom_toggle_"):
-            key = data.replace("symptom_toggle_", "")
-            symptom = next((s for s in self.symptoms if s.lower().replace(' ', '_') == key), key.replace('_', ' '))
-            if symptom == "Other":
-                context.user_data["awaiting_custom_symptom"] = True
-                await query.edit_message_text("Please type your custom symptom:")
-            else:
-                selected = context.user_data.setdefault("selected_symptoms", [])
-                if symptom in selected:
-                    selected.remove(symptom)
-                else:
-                    selected.append(symptom)
-                await self._show_symptom_options(query, context)
-            return
-        elif data == "symptom_submit":
-            selected = context.user_data.get("selected_symptoms", [])
-            if selected:
-                context.user_data['symptoms_pending_severity'] = selected
-                context.user_data['awaiting_severity'] = True
-                await query.edit_message_text("Please rate severity (1-5):")
-            else:
-                await query.answer("No symptoms selected", show_alert=True)
-            return
+    async def _handle_delete_product(self, update: Update, context):
+        """Delete a product and return to product management."""
+        query = update.callback_query
+        data = query.data
+        user_id = update.effective_user.id
+        product_name = data.removeprefix("delete_product_").translate(_UNSLUG)
+        success = await self.database.delete_product(user_id, product_name)
+        name = escape_markdown(product_name)
+        notice = f"✅ Product '{name}' deleted.\n\n" if success else f"❌ Failed to delete '{name}'.\n\n"
+        # One edit: the result is shown above the refreshed product list
+        await self._show_product_management(query, context, user_id, notice)
+
+    async def _handle_set_reminder(self, update: Update, context):
+        """Set or disable the daily reminder from a ``set_reminder_*`` button."""
+        query = update.callback_query
+        user_id = update.effective_user.id
+        time_or_action = query.data.removeprefix("set_reminder_")
 
-        if data.startswith("reminder_"):
-            time_str = data.split("_", 1)[1]
-            await self.database.update_user_reminder(user_id, time_str)
+        if time_or_action == "disable":
+            # Disable reminders
             if self.scheduler:
-                self.scheduler.schedule_daily_reminder(user_id, time_str)
-            await query.edit_message_text(
-                f"✅ Daily reminder set for {time_str}",
-            )
-            return
+                self.scheduler.remove_reminder(user_id)
+            await self.database.update_user_reminder(user_id, None)
+            self._send(query, "✅ Daily reminders disabled.")
+        else:
+            # Set new reminder time; the updated row tells us if this is onboarding
+            user = await self.database.update_user_reminder(user_id, time_or_action)
+            if self.scheduler:
+                self.scheduler.schedule_daily_reminder(user_id, time_or_action)
 
-        if data.startswith("mood_rate_"):
-            # Handle daily mood rating from check-in
-            rating_num = int(data.split("_", 2)[2])
-            rating_map = {
-                5: "Excellent",
-                4: "Good", 
-                3: "Okay",
-                2: "Bad",
-                1: "Very Bad"
-            }
-            
-            mood_description = rating_map.get(rating_num, "Unknown")
-            
-            # Log the mood rating
-            success = await self.database.log_daily_mood(user_id, rating_num, mood_description)
-            
-            if success:
-                emoji_map = {
-                    5: "✅",
-                    4: "🟢", 
-                    3: "🟡",
-                    2: "🟠",
-                    1: "🔴"
-                }
-                emoji = emoji_map.get(rating_num, "")
-                
-                await query.edit_message_text(
-                    f"✅ *Mood Logged!*\n\n"
-                    f"Today's skin feeling: {emoji} {mood_description}\n\n"
-                    f"Thanks for checking in! Continue with your daily log?",
+            is_onboarding = not user.get('onboarding_completed', False) if user else True
+
+            if is_onboarding:
+                self._send(
+                    query,
+                    f"✅ *Perfect!*\n\n"
+                    f"You'll get a daily reminder at {time_or_action} to check in with your skin.\n\n"
+                    f"Next, let's set up your tracking areas...",
                     parse_mode=ParseMode.MARKDOWN,
                     reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("📝 Continue Check-in", callback_data="daily_checkin")],
-                        [InlineKeyboardButton("🏠 Main Menu", callback_data="show_main_menu")]
+                        [InlineKeyboardButton("➡️ Continue Setup", callback_data="onboarding_areas")]
                     ])
                 )
             else:
-                await query.edit_message_text(
-                    "❌ Sorry, there was an error logging your mood. Please try again later."
-                )
-            return
-
-        if data.startswith("rating_"):
-            # Handle daily mood rating from reminder
-            rating_num = int(data.split("_", 1)[1])
-            rating_map = {
-                5: "Excellent",
-                4: "Good", 
-                3: "Okay",
-                2: "Bad",
-                1: "Flare-up"
-            }
-            
-            mood_description = rating_map.get(rating_num, "Unknown")
-            
-            # Log the mood rating
-            success = await self.database.log_daily_mood(user_id, rating_num, mood_description)
-            
-            if success:
-                emoji_map = {
-                    5: "😃",
-                    4: "🙂", 
-                    3: "😐",
-                    2: "😕",
-                    1: "😫"
-                }
-                emoji = emoji_map.get(rating_num, "")
-                
-                await query.edit_message_text(
-                    f"✅ Thanks for sharing! Logged: {emoji} {mood_description}\n\n"
-                    f"Take care of your skin today! 💚"
-                )
-            else:
-                await query.edit_message_text(
-                    "❌ Sorry, there was an error logging your mood. Please try again later."
-                )
-            return
+                await self._show_settings(update, context, f"✅ Daily reminder set for {time_or_action}\n\n")
 
-        # Settings handlers
-        if data == "settings_back":
-            await self._show_settings(update, context)
+    async def _handle_delete_data(self, update: Update, context):
+        """Ask for confirmation before deleting a category of user data."""
+        query = update.callback_query
+        data_type = query.data.removeprefix("delete_data_")
+
+        if data_type == "photos":
+            confirmation_text = "📸 Delete all photos and skin analysis data?"
+        elif data_type == "logs":
+            confirmation_text = "📝 Delete all logging data (products, triggers, symptoms, moods)?"
+        elif data_type == "all":
+            confirmation_text = "🗑️ Delete ALL data? This cannot be undone!"
+        else:
             return
 
-        if data.startswith("set_reminder_"):
-            time_or_action = data.replace("set_reminder_", "")
-            if time_or_action == "disable":
-                # Disable reminders
-                if self.scheduler:
-                    self.scheduler.remove_reminder(user_id)
-                await self.database.update_user_reminder(user_id, None)
-                await query.edit_message_text("✅ Daily reminders disabled.")
-            else:
-                # Set new reminder time
-                await self.database.update_user_reminder(user_id, time_or_action)
-                if self.scheduler:
-                    self.scheduler.schedule_daily_reminder(user_id, time_or_action)
-                
-                # Check if this is from onboarding
-                user = await self.database.get_user_by_telegram_id(user_id)
-                is_onboarding = not user.get('onboarding_completed', False) if user else True
-                
-                if is_onboarding:
-                    await query.edit_message_text(
-                        f"✅ *Perfect!*\n\n"
-                        f"You'll get a daily reminder at {time_or_action} to check in with your skin.\n\n"
-                        f"Next, let's set up your tracking areas...",
-                        parse_mode=ParseMode.MARKDOWN,
-                        reply_markup=InlineKeyboardMarkup([
-                            [InlineKeyboardButton("➡️ Continue Setup", callback_data="onboarding_areas")]
-                        ])
-                    )
-                else:
-                    await query.edit_message_text(f"✅ Daily reminder set for {time_or_action}")
-                    # Return to settings after 2 seconds
-                    await asyncio.sleep(2)
-                    await self._show_settings(update, context)
-            return
+        # Show confirmation
+        keyboard = [
+            [InlineKeyboardButton("✅ Yes, Delete", callback_data=f"confirm_delete_{data_type}")],
+            [InlineKeyboardButton("❌ Cancel", callback_data="settings_delete_data")]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        self._send(
+            query,
+            f"⚠️ *Confirmation Required*\n\n{confirmation_text}",
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=reply_markup
+        )
 
-        if data.startswith("edit_product_"):
-            product_name = data.replace("edit_product_", "").replace("_", " ")
-            context.user_data["editing_product"] = product_name
-            keyboard = [
-                [InlineKeyboardButton("✏️ Rename", callback_data=f"rename_product_{product_name.replace(' ', '_')}")],
-                [InlineKeyboardButton("🗑️ Delete", callback_data=f"delete_product_{product_name.replace(' ', '_')}")],
-                [InlineKeyboardButton("⬅️ Back", callback_data="settings_products")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                f"🏷️ *Product: {product_name}*\n\nWhat would you like to do?",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
-            )
+    async def _handle_confirm_delete(self, update: Update, context):
+        """Delete the confirmed category of user data."""
+        query = update.callback_query
+        user_id = update.effective_user.id
+        data_type = query.data.removeprefix("confirm_delete_")
+
+        # Determine what to delete
+        if data_type == "photos":
+            types_to_delete = ["photos", "kpis"]
+        elif data_type == "logs":
+            types_to_delete = ["products", "triggers", "symptoms", "moods"]
+        elif data_type == "all":
+            types_to_delete = ["photos", "products", "triggers", "symptoms", "moods", "kpis"]
+        else:
             return
 
-        if data.startswith("rename_product_"):
-            product_name = data.replace("rename_product_", "").replace("_", " ")
-            context.user_data["renaming_product"] = product_name
-            context.user_data["awaiting_new_product_name"] = True
-            await query.edit_message_text(f"✏️ Enter new name for '{product_name}':")
-            return
+        # Perform deletion
+        results = await self.database.delete_all_user_data(user_id, types_to_delete)
+        self.kpi_analyzer.invalidate(user_id)
 
-        if data.startswith("delete_product_"):
-            product_name = data.replace("delete_product_", "").replace("_", " ")
-            success = await self.database.delete_product(user_id, product_name)
-            if success:
-                await query.edit_message_text(f"✅ Product '{product_name}' deleted.")
-            else:
-                await query.edit_message_text(f"❌ Failed to delete '{product_name}'.")
-            
-            await asyncio.sleep(2)
-            await self._show_product_management(query, context, user_id)
-            return
+        success_count = sum(results.values())
+        total_count = len(results)
 
-        if data.startswith("delete_data_"):
-            data_type = data.replace("delete_data_", "")
-            
-            if data_type == "photos":
-                types_to_delete = ["photos", "kpis"]
-                confirmation_text = "📸 Delete all photos and skin analysis data?"
-            elif data_type == "logs":
-                types_to_delete = ["products", "triggers", "symptoms", "moods"]
-                confirmation_text = "📝 Delete all logging data (products, triggers, symptoms, moods)?"
-            elif data_type == "all":
-                types_to_delete = ["photos", "products", "triggers", "symptoms", "moods", "kpis"]
-                confirmation_text = "🗑️ Delete ALL data? This cannot be undone!"
-            else:
-                return
+        if results and success_count == total_count:
+            notice = "✅ Data deleted successfully!\n\n"
+        else:
+            notice = f"⚠️ Partial success: {success_count}/{total_count} deletions completed.\n\n"
+        await self._show_settings(update, context, notice)
 
-            # Show confirmation
-            keyboard = [
-                [InlineKeyboardButton("✅ Yes, Delete", callback_data=f"confirm_delete_{data_type}")],
-                [InlineKeyboardButton("❌ Cancel", callback_data="settings_delete_data")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                f"⚠️ *Confirmation Required*\n\n{confirmation_text}",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
-            )
-            return
+    def _reminder_time_keyboard(self) -> InlineKeyboardMarkup:
+        """Return the keyboard with common reminder time options."""
+        return self._reminder_time_markup
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _build_two_col_markup(prefix: str, names: Tuple[str, ...]) -> InlineKeyboardMarkup:
+        """Lay out option buttons two per row with ``prefix`` callback data.
+
+        Markups are immutable, so one is built per distinct name list and
+        reused by every user who has the same products.
+        """
+        buttons = iter([
+            InlineKeyboardButton(name, callback_data=f"{prefix}{name.translate(_SLUG)}")
+            for name in names
+        ])
+        keyboard = [
+            [left, right] if right is not None else [left]
+            for left, right in zip_longest(buttons, buttons)
+        ]
+        return InlineKeyboardMarkup(keyboard)
 
-        if data.startswith("confirm_delete_"):
-            data_type = data.replace("confirm_delete_", "")
-            
-            # Determine what to delete
-            if data_type == "photos":
-                types_to_delete = ["photos", "kpis"]
-            elif data_type == "logs":
-                types_to_delete = ["products", "triggers", "symptoms", "moods"]
-            elif data_type == "all":
-                types_to_delete = ["photos", "products", "triggers", "symptoms", "moods", "kpis"]
-            else:
-                return
+    @staticmethod
+    def _build_trigger_markup(slugs: Dict[str, str], selected: Dict[str, None]) -> InlineKeyboardMarkup:
+        """Build the multi-select trigger keyboard from a slug -> name map.
 
-            # Perform deletion
-            results = await self.database.delete_all_user_data(user_id, types_to_delete)
-            
-            success_count = sum(1 for success in results.values() if success)
-            total_count = len(results)
-            
-            if success_count == total_count:
-                await query.edit_message_text("✅ Data deleted successfully!")
-            else:
-                await query.edit_message_text(f"⚠️ Partial success: {success_count}/{total_count} deletions completed.")
-            
-            await asyncio.sleep(2)
-            await self._show_settings(update, context)
-            return
+        "Other" opens free-text entry instead of toggling, so it is never
+        in ``selected`` and never gets a check mark.
+        """
+        keyboard = [
+            [InlineKeyboardButton(
+                f"✅ {name}" if name in selected else name, callback_data=f"trigger_toggle_{slug}"
+            )]
+            for slug, name in slugs.items()
+        ]
+        keyboard.append([InlineKeyboardButton("✅ Submit", callback_data="trigger_submit")])
+        return InlineKeyboardMarkup(keyboard)
 
-    def _reminder_time_keyboard(self) -> InlineKeyboardMarkup:
-        """Build keyboard with common reminder time options."""
-        times = ["09:00", "12:00", "18:00"]
-        keyboard = [[InlineKeyboardButton(t, callback_data=f"reminder_{t}")] for t in times]
+    def _build_symptom_markup(self, selected: Dict[str, None]) -> InlineKeyboardMarkup:
+        """Build the multi-select symptom keyboard."""
+        keyboard = [
+            [InlineKeyboardButton(f"✅ {name}" if name in selected else name, callback_data=data)]
+            for name, data in self._symptom_buttons
+        ]
+        keyboard.append([InlineKeyboardButton("✅ Submit", callback_data="symptom_submit")])
         return InlineKeyboardMarkup(keyboard)
 
     async def _show_product_options(self, query):
         """Show product selection keyboard."""
         user_id = query.from_user.id
         products = await self.database.get_products(user_id)
-        names = [p['name'] for p in products] if products else self.default_products
-        if "Other" not in names:
-            names.append("Other")
-        keyboard = []
-        for i in range(0, len(names), 2):
-            row = []
-            row.append(
-                InlineKeyboardButton(
-                    names[i],
-                    callback_data=f"product_{names[i].replace(' ', '_')}"
-                )
-            )
-            if i + 1 < len(names):
-                row.append(
-                    InlineKeyboardButton(
-                        names[i + 1],
-                        callback_data=f"product_{names[i + 1].replace(' ', '_')}"
-                    )
-                )
-            keyboard.append(row)
+        if products:
+            names = [p['name'] for p in products]
+            if "Other" not in names:
+                names.append("Other")
+            reply_markup = self._build_two_col_markup("product_", tuple(names))
+        else:
+            reply_markup = self._default_product_markup
 
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(
+        self._send(
+            query,
             "🧴 Which product did you use?",
             reply_markup=reply_markup
         )
 
-    async def _show_trigger_options(self, query, context):
-        """Show trigger selection keyboard with multi-select."""
-        user_id = query.from_user.id
-        triggers = await self.database.get_triggers(user_id)
-        names = [t['name'] for t in triggers] if triggers else self.default_triggers
-        if "Other" not in names:
-            names.append("Other")
-        context.user_data['available_triggers'] = names
-        selected = context.user_data.get("selected_triggers", [])
-        keyboard = []
-        for trigger in names:
-            if trigger == "Other":
-                keyboard.append([
-                    InlineKeyboardButton("Other", callback_data="trigger_toggle_other")
-                ])
-            else:
-                prefix = "✅ " if trigger in selected else ""
-                keyboard.append([
-                    InlineKeyboardButton(
-                        f"{prefix}{trigger}",
-                        callback_data=f"trigger_toggle_{trigger.lower().replace(' ', '_')}",
-                    )
-                ])
+    async def _show_trigger_options(self, query, context, refresh: bool = True):
+        """Show trigger selection keyboard with multi-select.
 
-        keyboard.append([InlineKeyboardButton("✅ Submit", callback_data="trigger_submit")])
+        Toggles pass ``refresh=False`` to reuse the triggers loaded when the
+        selection started; starting a new selection always reloads them.
+        """
+        selected = context.user_data.get("selected_triggers", {})
+        slugs = None if refresh else context.user_data.get('trigger_slugs')
+        if slugs is not None:
+            reply_markup = self._build_trigger_markup(slugs, selected)
+        else:
+            triggers = await self.database.get_triggers(query.from_user.id)
+            names = [t['name'] for t in triggers] if triggers else [*self.default_triggers, "Other"]
+            if "Other" not in names:
+                names.append("Other")
+            # slug -> name, so trigger_toggle_ taps resolve with a dict lookup
+            slugs = context.user_data['trigger_slugs'] = {t.translate(_LOWER_SLUG): t for t in names}
+            if not triggers and not selected:
+                reply_markup = self._default_trigger_markup
+            else:
+                reply_markup = self._build_trigger_markup(slugs, selected)
 
-        await query.edit_message_text(
+        self._schedule_edit(
+            query,
             "⚡ Select triggers and tap Submit:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=reply_markup,
         )
 
     async def _show_symptom_options(self, query, context):
         """Show symptom selection keyboard with multi-select."""
-        selected = context.user_data.get("selected_symptoms", [])
-        keyboard = []
-        for symptom in self.symptoms:
-            if symptom == "Other":
-                keyboard.append([
-                    InlineKeyboardButton("Other", callback_data="symptom_toggle_other")
-                ])
-            else:
-                prefix = "✅ " if symptom in selected else ""
-                keyboard.append([
-                    InlineKeyboardButton(
-                        f"{prefix}{symptom}",
-                        callback_data=f"symptom_toggle_{symptom.lower().replace(' ', '_')}",
-                    )
-                ])
-
-        keyboard.append([InlineKeyboardButton("✅ Submit", callback_data="symptom_submit")])
+        selected = context.user_data.get("selected_symptoms", {})
+        reply_markup = self._build_symptom_markup(selected) if selected else self._symptom_markup
 
-        await query.edit_message_text(
+        self._schedule_edit(
+            query,
             "📊 Select symptoms and tap Submit:",
-            reply_markup=InlineKeyboardMarkup(keyboard),
+            reply_markup=reply_markup,
         )
 
+    @staticmethod
+    def _result_or(result, default, what: str):
+        """Unwrap one ``gather(..., return_exceptions=True)`` result.
+
+        A failed query is logged and replaced with ``default`` so the caller
+        can still show the sections that did load.
+        """
+        if isinstance(result, Exception):
+            logger.error("Error loading %s", what, exc_info=result)
+            return default
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
     async def _log_product(self, query, user_id: int, product_name: str):
         """Log a product usage."""
         try:
             await self.database.log_product(user_id, product_name)
-            await query.edit_message_text(
-                f"✅ Logged product: {product_name}\n\n"
-                "Use /log to record more or /summary for insights!"
-            )
-        except Exception as e:
+        except Exception:
             logger.exception("Error logging product")
-            await query.edit_message_text("Sorry, there was an error logging your product.")
-
-    async def _log_trigger(self, query, user_id: int, trigger_name: str):
-        """Log a trigger."""
-        try:
-            await self.database.log_trigger(user_id, trigger_name)
-            await query.edit_message_text(
-                f"✅ Logged trigger: {trigger_name}\n\n"
-                "Use /log to record more or /summary for insights!"
+            self._send(
+                query,
+                "Sorry, there was an error logging your product.",
+                reply_markup=self._main_menu_markup,
             )
-        except Exception as e:
-            logger.exception("Error logging trigger")
-            await query.edit_message_text("Sorry, there was an error logging your trigger.")
+            return
+        # Queued, so the handler doesn't wait on Telegram for the edit
+        self._send(
+            query,
+            f"✅ Logged product: {product_name}\n\n"
+            "Use /log to record more or /summary for insights!",
+            reply_markup=self._main_menu_markup,
+        )
+
+    async def _route_message(self, update: Update, context):
+        """Dispatch a photo or plain text message to its handler."""
+        if update.message.photo:
+            await self.handle_photo(update, context)
+        else:
+            await self.handle_text(update, context)
 
     async def handle_photo(self, update: Update, context):
         user_id = update.effective_user.id
         photo = update.message.photo[-1]
+        status_msg = None
+        temp_path = None
 
         try:
             logger.info(f"[Photo] Starting photo handling for user {user_id}")
+            # Acknowledge straight away; the upload and analysis follow
+            status_msg = await update.message.reply_text("📷 Processing…")
             file = await context.bot.get_file(photo.file_id)
             logger.info(f"[Photo] Got file info for user {user_id}, file_id: {photo.file_id}")
             
             photo_url, temp_path, image_id = await self.database.save_photo(user_id, file)
             logger.info(f"[Photo] Saved photo for user {user_id}: url={photo_url}, temp_path={temp_path}, image_id={image_id}")
 
-            async def process_and_cleanup():
-                try:
-                    logger.info(f"[Photo] Starting background analysis for user {user_id}, image_id={image_id}")
-                    # If process_skin_image takes (path, user_id, image_id, client, analysis_provider)
-                    await asyncio.to_thread(
-                        process_skin_image,
-                        temp_path,
-                        str(user_id),
-                        image_id,
-                        self.database.client,
-                        self.analysis_provider,   # ← remove this arg if not in the signature
-                    )
-                    logger.info(f"[Photo] Background analysis completed for user {user_id}, image_id={image_id}")
-                except Exception:
-                    logger.exception("process_skin_image failed for image_id=%s", image_id)
-                finally:
-                    try:
-                        os.unlink(temp_path)
-                        logger.info("Temp file deleted: %s", temp_path)
-                    except Exception as cleanup_error:
-                        logger.warning("Could not delete temp file %s: %s", temp_path, cleanup_error)
-
-            # Kick off the background work (no extra parentheses)
-            asyncio.create_task(process_and_cleanup())
-
             logger.info(f"[Photo] Logging photo to database for user {user_id}")
             await self.database.log_photo(user_id, photo_url)
             logger.info(f"[Photo] Successfully logged photo for user {user_id}")
-            
-            await update.message.reply_text("📷 Photo uploaded successfully!")
-            await self.send_main_menu(update)
-            logger.info(f"[Photo] Completed photo handling for user {user_id}")
 
         except Exception:
             logger.exception("Error handling photo")
-            await update.message.reply_text(
-                "Sorry, there was an error processing your photo. Please try again."
+            if temp_path is not None:
+                await self._remove_temp_file(temp_path)
+            error_text = "Sorry, there was an error processing your photo. Please try again."
+            if status_msg is not None:
+                await status_msg.edit_text(error_text, reply_markup=self._main_menu_markup)
+            else:
+                await update.message.reply_text(error_text, reply_markup=self._main_menu_markup)
+            return
+
+        # Analysis runs in the background, and only for a logged photo; when
+        # too many photos are waiting, this one is stored without it.
+        try:
+            self._photo_queue.put_nowait((user_id, temp_path, image_id))
+            text = "📷 Photo uploaded successfully!"
+        except asyncio.QueueFull:
+            logger.warning("Photo queue full; skipping analysis for image_id=%s", image_id)
+            await self._remove_temp_file(temp_path)
+            text = PHOTO_QUEUE_FULL_TEXT
+
+        # Confirmed only once the upload and insert have succeeded
+        try:
+            await status_msg.edit_text(text, reply_markup=self._main_menu_markup)
+        except Exception:
+            # The photo is saved; only the confirmation is lost
+            logger.exception("Failed to confirm photo upload")
+        logger.info(f"[Photo] Completed photo handling for user {user_id}")
+
+    async def _analyse_photo(self, user_id: int, temp_path: str, image_id: str) -> None:
+        """Run skin analysis on a saved photo, then delete its temp file."""
+        try:
+            logger.info(f"[Photo] Starting background analysis for user {user_id}, image_id={image_id}")
+            await asyncio.get_running_loop().run_in_executor(
+                self._analysis_pool, run_skin_analysis, temp_path, str(user_id), image_id
             )
-            await self.send_main_menu(update)
+            logger.info(f"[Photo] Background analysis completed for user {user_id}, image_id={image_id}")
+        except Exception:
+            logger.exception("process_skin_image failed for image_id=%s", image_id)
+        finally:
+            self.kpi_analyzer.invalidate(user_id)
+            await self._remove_temp_file(temp_path)
 
-    async def handle_text(self, update: Update, context):
-        """Handle plain text messages for custom trigger/symptom inputs."""
+    @staticmethod
+    async def _remove_temp_file(temp_path: str) -> None:
+        """Delete a saved photo's temp file, logging rather than raising."""
+        try:
+            await asyncio.to_thread(os.unlink, temp_path)
+            logger.info("Temp file deleted: %s", temp_path)
+        except Exception as cleanup_error:
+            logger.warning("Could not delete temp file %s: %s", temp_path, cleanup_error)
+
+    async def _enter_custom_symptom(self, update: Update, context):
+        """Ask for a custom symptom name."""
+        query = update.callback_query
+        await query.answer()
+        self._cancel_scheduled_edit(query)
+        self._send(query, "Please type your custom symptom:")
+        return AWAIT_CUSTOM_SYMPTOM
+
+    async def _enter_severity(self, update: Update, context):
+        """Ask for the severity of the selected symptoms."""
+        query = update.callback_query
+        selected = context.user_data.get("selected_symptoms", {})
+        if not selected:
+            await query.answer("No symptoms selected", show_alert=True)
+            return ConversationHandler.END
+        await query.answer()
+        context.user_data['symptoms_pending_severity'] = list(selected)
+        self._cancel_scheduled_edit(query)
+        self._send(query, "Please rate severity (1-5):")
+        return AWAIT_SEVERITY
+
+    async def _save_custom_symptom(self, update: Update, context):
+        """Store the custom symptom name and ask for its severity."""
+        context.user_data['symptoms_pending_severity'] = [update.message.text.strip()]
+        await update.message.reply_text("Please rate severity (1-5):")
+        return AWAIT_SEVERITY
+
+    async def _save_severity(self, update: Update, context):
+        """Log the pending symptoms with the severity the user replied."""
         user_id = update.effective_user.id
-        text = update.message.text.strip()
-        if context.user_data.get("awaiting_severity"):
+        severity = int(update.message.text)
+        symptoms = context.user_data.pop('symptoms_pending_severity', [])
+        if symptoms:
             try:
-                severity = int(text)
-                if severity < 1 or severity > 5:
-                    raise ValueError
-                symptoms = context.user_data.get('symptoms_pending_severity', [])
-                for s in symptoms:
-                    await self.database.log_symptom(user_id, s, severity)
-                context.user_data.pop('awaiting_severity', None)
-                context.user_data.pop('symptoms_pending_severity', None)
-                context.user_data['selected_symptoms'] = []
+                await self.database.log_symptoms(user_id, symptoms, severity)
+            except Exception:
+                logger.exception("Error logging symptoms")
                 await update.message.reply_text(
-                    f"✅ Logged symptoms: {', '.join(symptoms)} (severity {severity})"
+                    "Sorry, there was an error logging your symptoms.",
+                    reply_markup=self._main_menu_markup,
                 )
-                await self.send_main_menu(update)
-            except ValueError:
-                await update.message.reply_text("Please enter a number between 1 and 5 for severity.")
-        elif context.user_data.get("awaiting_custom_product"):
-            await self.database.add_product(user_id, text)
-            await self.database.log_product(user_id, text)
-            del context.user_data["awaiting_custom_product"]
-            await update.message.reply_text(f"✅ Logged product: {text}")
-            await self.send_main_menu(update)
-        elif context.user_data.get("awaiting_custom_trigger"):
-            await self.database.add_trigger(user_id, text)
-            await self.database.log_trigger(user_id, text)
-            del context.user_data["awaiting_custom_trigger"]
-            await update.message.reply_text(f"✅ Logged trigger: {text}")
-            await self.send_main_menu(update)
-        elif context.user_data.get("awaiting_custom_symptom"):
-            context.user_data['symptoms_pending_severity'] = [text]
-            context.user_data['awaiting_severity'] = True
-            del context.user_data["awaiting_custom_symptom"]
-            await update.message.reply_text("Please rate severity (1-5):")
-        elif context.user_data.get("awaiting_condition_name"):
-            context.user_data["new_condition_name"] = text
-            context.user_data.pop("awaiting_condition_name", None)
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Existing", callback_data="condition_type_existing"
-                    ),
-                    InlineKeyboardButton(
-                        "Developed", callback_data="condition_type_developed"
-                    ),
-                ]
-            ]
+                return ConversationHandler.END
+        context.user_data['selected_symptoms'] = {}
+        try:
             await update.message.reply_text(
-                "Is this condition existing or developed?",
-                reply_markup=InlineKeyboardMarkup(keyboard),
+                f"✅ Logged symptoms: {', '.join(symptoms)} (severity {severity})",
+                reply_markup=self._main_menu_markup,
             )
-            context.user_data["awaiting_condition_type"] = True
-        elif context.user_data.get("awaiting_new_product_name"):
-            # Handle product renaming
-            old_name = context.user_data.get("renaming_product")
-            new_name = text.strip()
-            
-            if old_name and new_name:
-                success = await self.database.update_product_name(user_id, old_name, new_name)
-                if success:
-                    await update.message.reply_text(f"✅ Product renamed: '{old_name}' → '{new_name}'")
-                else:
-                    await update.message.reply_text(f"❌ Failed to rename product '{old_name}'")
+        except Exception:
+            # The symptoms are saved; only the confirmation is lost
+            logger.exception("Failed to confirm logged symptoms")
+        return ConversationHandler.END
+
+    async def _reject_severity(self, update: Update, context):
+        """Re-prompt when the severity reply is not 1-5."""
+        await update.message.reply_text("Please enter a number between 1 and 5 for severity.")
+        return AWAIT_SEVERITY
+
+    async def _leave_symptom_flow(self, update: Update, context):
+        """End the symptom conversation and handle the button normally."""
+        context.user_data.pop('symptoms_pending_severity', None)
+        await self.handle_callback(update, context)
+        return ConversationHandler.END
+
+    async def handle_text(self, update: Update, context):
+        """Handle plain text messages for custom trigger/symptom inputs."""
+        handler = self._text_handlers.get(context.user_data.pop("awaiting", None))
+        if handler is None:
+            await update.message.reply_text("I'm not sure what you mean. Use /help to see available commands!")
+        else:
+            await handler(update, context, update.message.text.strip())
+
+    async def _save_custom_product(self, update: Update, context, text: str):
+        """Add and log the product the user typed."""
+        await self.database.add_and_log_product(update.effective_user.id, text)
+        await update.message.reply_text(
+            f"✅ Logged product: {text}", reply_markup=self._main_menu_markup
+        )
+
+    async def _save_custom_trigger(self, update: Update, context, text: str):
+        """Add and log the trigger the user typed."""
+        await self.database.add_and_log_trigger(update.effective_user.id, text)
+        await update.message.reply_text(
+            f"✅ Logged trigger: {text}", reply_markup=self._main_menu_markup
+        )
+
+    async def _save_condition_name(self, update: Update, context, text: str):
+        """Keep the typed condition name and ask for its type."""
+        context.user_data["new_condition_name"] = text
+        keyboard = [
+            [
+                InlineKeyboardButton(
+                    "Existing", callback_data="condition_type_existing"
+                ),
+                InlineKeyboardButton(
+                    "Developed", callback_data="condition_type_developed"
+                ),
+            ]
+        ]
+        await update.message.reply_text(
+            "Is this condition existing or developed?",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+        )
+
+    async def _save_new_product_name(self, update: Update, context, text: str):
+        """Rename the product chosen earlier and return to product management."""
+        user_id = update.effective_user.id
+        old_name = context.user_data.pop("renaming_product", None)
+        new_name = text
+
+        if old_name and new_name:
+            success = await self.database.update_product_name(user_id, old_name, new_name)
+            old, new = escape_markdown(old_name), escape_markdown(new_name)
+            if success:
+                notice = f"✅ Product renamed: '{old}' → '{new}'\n\n"
             else:
-                await update.message.reply_text("❌ Invalid product name")
-            
-            # Clean up and return to product management
-            context.user_data.pop("awaiting_new_product_name", None)
-            context.user_data.pop("renaming_product", None)
-            
-            # Show updated product list after a short delay
-            await asyncio.sleep(1)
-            # Create a fake query object to reuse the existing method
-            class FakeQuery:
-                def __init__(self, message):
-                    self.message = message
-                
-                async def edit_message_text(self, text, parse_mode=None, reply_markup=None):
-                    await self.message.reply_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
-            
-            fake_query = FakeQuery(update.message)
-            await self._show_product_management(fake_query, context, user_id)
+                notice = f"❌ Failed to rename product '{old}'\n\n"
         else:
-            await update.message.reply_text("I'm not sure what you mean. Use /help to see available commands!")
+            notice = "❌ Invalid product name\n\n"
+
+        # One reply: the result is shown above the refreshed product list
+        await self._show_product_management(
+            _ReplyAdapter(update.message), context, user_id, notice
+        )
 
     # Timeline and Quick Logging Commands
     
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _timeline_markup(base_url: str, user_id: int) -> InlineKeyboardMarkup:
+        """Timeline links for one user, built once and reused on later calls."""
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton(
+                "📈 Open Timeline (WebApp)",
+                web_app=WebAppInfo(url=f"{base_url}/timeline?user_id={user_id}"),
+            )],
+            [InlineKeyboardButton(
+                "🌐 Open Timeline (GitHub Pages)",
+                url=f"https://rstrinati.github.io/SkinTracker/timeline-standalone.html?user_id={user_id}",
+            )],
+            [InlineKeyboardButton(
+                "🔗 Open in Browser", url=f"{base_url}/timeline?user_id={user_id}&mode=browser"
+            )],
+        ])
+
     async def timeline_command(self, update: Update, context):
         """Handle /timeline command - show timeline web app."""
         try:
-            # Create timeline web app URL with user ID
-            base_url = os.getenv('BASE_URL', 'https://rstrinati.github.io/SkinTracker')
-            user_id = update.effective_user.id
-            
-            # Create different URLs for different hosting scenarios
-            timeline_urls = {
-                'webapp': f"{base_url}/timeline?user_id={user_id}",
-                'github': f"https://rstrinati.github.io/SkinTracker/timeline-standalone.html?user_id={user_id}",
-                'browser': f"{base_url}/timeline?user_id={user_id}&mode=browser"
-            }
-            
-            # Create inline keyboard with Web App button
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
-            
-            keyboard = [
-                [InlineKeyboardButton("📈 Open Timeline (WebApp)", web_app=WebAppInfo(url=timeline_urls['webapp']))],
-                [InlineKeyboardButton("🌐 Open Timeline (GitHub Pages)", url=timeline_urls['github'])],
-                [InlineKeyboardButton("🔗 Open in Browser", url=timeline_urls['browser'])]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
+            reply_markup = self._timeline_markup(self.config.base_url, update.effective_user.id)
             await update.message.reply_text(
-                "📈 *Your Skin Health Timeline*\n\n"
-                "View your complete skin health journey with:\n"
-                "• 📊 All symptoms, triggers, and treatments\n"
-                "• 🔍 AI insights on what's working\n"
-                "• 📈 Trends and patterns over time\n"
-                "• 📷 Photo timeline with analysis\n\n"
-                "Choose how to open your timeline:",
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
+                TIMELINE_TEXT, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup
             )
-            
-        except Exception as e:
-            logger.error(f"Error in timeline command: {e}")
+        except Exception:
+            logger.exception("Error in timeline command")
             await update.message.reply_text("❌ Error opening timeline. Please try again later.")
 
     async def quick_trigger_command(self, update: Update, context):
@@ -1788,13 +2487,9 @@ Successfully set up {success_count} tracking areas:
         try:
             user_id = update.effective_user.id
             
-            # Parse command arguments
-            if context.args:
-                trigger_text = " ".join(context.args)
-                parts = trigger_text.split(' note:"')
-                trigger_name = parts[0].strip()
-                notes = parts[1].rstrip('"') if len(parts) > 1 else None
-                
+            # Parse command arguments; a note with no name gets the usage
+            trigger_name, notes = parse_note(" ".join(context.args or ()))
+            if trigger_name:
                 # Log the trigger
                 await self.database.log_trigger(user_id, trigger_name, notes)
                 
@@ -1814,8 +2509,8 @@ Successfully set up {success_count} tracking areas:
                     parse_mode=ParseMode.MARKDOWN
                 )
                 
-        except Exception as e:
-            logger.error(f"Error in quick trigger command: {e}")
+        except Exception:
+            logger.exception("Error in quick trigger command")
             await update.message.reply_text("❌ Error logging trigger. Please try again.")
 
     async def quick_symptom_command(self, update: Update, context):
@@ -1826,27 +2521,20 @@ Successfully set up {success_count} tracking areas:
             # Parse command arguments
             if len(context.args) >= 2:
                 symptom_name = context.args[0]
-                try:
-                    severity = int(context.args[1])
-                    if severity < 1 or severity > 5:
-                        raise ValueError("Severity must be 1-5")
-                except ValueError:
+                if not _SEVERITY_RE.match(context.args[1]):
                     await update.message.reply_text(
                         "❌ Invalid severity. Please use a number from 1 (mild) to 5 (severe)."
                     )
                     return
+                severity = int(context.args[1])
                 
                 # Check for notes
-                notes = None
-                if len(context.args) > 2:
-                    remaining_args = " ".join(context.args[2:])
-                    if remaining_args.startswith('note:"') and remaining_args.endswith('"'):
-                        notes = remaining_args[6:-1]  # Remove note:" and closing "
+                notes = parse_note(" ".join(context.args[2:]))[1]
                 
                 # Log the symptom
                 await self.database.log_symptom(user_id, symptom_name, severity, notes)
                 
-                severity_emoji = ["", "😐", "😕", "😖", "😣", "😫"][severity]
+                severity_emoji = SEVERITY_EMOJI[severity]
                 response = f"✅ Symptom logged: *{symptom_name}* {severity_emoji} (Severity: {severity}/5)"
                 if notes:
                     response += f"\nNote: _{notes}_"
@@ -1868,8 +2556,8 @@ Successfully set up {success_count} tracking areas:
                     parse_mode=ParseMode.MARKDOWN
                 )
                 
-        except Exception as e:
-            logger.error(f"Error in quick symptom command: {e}")
+        except Exception:
+            logger.exception("Error in quick symptom command")
             await update.message.reply_text("❌ Error logging symptom. Please try again.")
 
     async def quick_product_command(self, update: Update, context):
@@ -1877,13 +2565,9 @@ Successfully set up {success_count} tracking areas:
         try:
             user_id = update.effective_user.id
             
-            # Parse command arguments
-            if context.args:
-                product_text = " ".join(context.args)
-                parts = product_text.split(' note:"')
-                product_name = parts[0].strip()
-                notes = parts[1].rstrip('"') if len(parts) > 1 else None
-                
+            # Parse command arguments; a note with no name gets the usage
+            product_name, notes = parse_note(" ".join(context.args or ()))
+            if product_name:
                 # Log the product (effect defaults to "Applied")
                 await self.database.log_product(user_id, product_name, effect="Applied", notes=notes)
                 
@@ -1903,19 +2587,21 @@ Successfully set up {success_count} tracking areas:
                     parse_mode=ParseMode.MARKDOWN
                 )
                 
-        except Exception as e:
-            logger.error(f"Error in quick product command: {e}")
+        except Exception:
+            logger.exception("Error in quick product command")
             await update.message.reply_text("❌ Error logging product. Please try again.")
 
     # ========== NEW UX ENHANCEMENT METHODS ==========
 
-    async def _handle_checkin_actions(self, query, context):
+    async def _handle_checkin_actions(self, update: Update, context):
         """Handle specific check-in actions."""
+        query = update.callback_query
         data = query.data
         user_id = query.from_user.id
         
         if data == "checkin_photo":
-            await query.edit_message_text(
+            self._send(
+                query,
                 "📸 *Daily Photo Check-in*\n\n"
                 "Upload today's skin photo:\n\n"
                 "*💡 For best results:*\n"
@@ -1930,14 +2616,14 @@ Successfully set up {success_count} tracking areas:
             await self._show_mood_rating(query, context)
             
         elif data == "checkin_symptoms":
-            context.user_data["selected_symptoms"] = []
+            context.user_data["selected_symptoms"] = {}
             await self._show_symptom_options(query, context)
             
         elif data == "checkin_products":
             await self._show_product_options(query)
             
         elif data == "checkin_triggers":
-            context.user_data["selected_triggers"] = []
+            context.user_data["selected_triggers"] = {}
             await self._show_trigger_options(query, context)
 
     async def _show_mood_rating(self, query, context):
@@ -1966,46 +2652,56 @@ Rate your overall skin condition on a scale of 1-5:
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
 
     async def _show_area_details(self, query, context, user_id, area_name):
         """Show detailed progress for a specific area."""
         # Get area-specific data
-        area_logs = await self.database.get_area_logs(user_id, area_name, days=30)
-        area_photos = await self.database.get_area_photos(user_id, area_name, days=30)
+        area_logs, area_photos = await asyncio.gather(
+            self.database.get_area_logs(user_id, area_name, days=30),
+            self.database.get_area_photos(user_id, area_name, days=30),
+        )
         
-        text = f"📊 *{area_name} - Detailed Progress*\n\n"
+        parts = [f"📊 *{area_name} - Detailed Progress*\n\n"]
         
         if not area_logs and not area_photos:
-            text += "No recent activity for this area.\n\n"
-            text += "*Start logging symptoms and uploading photos to track progress!*"
+            parts.append(
+                "No recent activity for this area.\n\n"
+                "*Start logging symptoms and uploading photos to track progress!*"
+            )
         else:
             # Show recent activity summary
-            text += f"📈 **Last 30 Days:**\n"
-            text += f"• Symptom logs: {len(area_logs)}\n"
-            text += f"• Photos: {len(area_photos)}\n\n"
+            parts.append(
+                f"📈 **Last 30 Days:**\n"
+                f"• Symptom logs: {len(area_logs)}\n"
+                f"• Photos: {len(area_photos)}\n\n"
+            )
             
             # Show recent symptoms if any
             if area_logs:
-                recent_symptoms = {}
-                for log in area_logs[-5:]:  # Last 5 logs
-                    symptom = log['symptom_name']
-                    severity = log['severity']
-                    recent_symptoms[symptom] = recent_symptoms.get(symptom, []) + [severity]
+                # symptom -> (severity total, count) over the last 5 logs
+                recent_symptoms: Dict[str, Tuple[int, int]] = {}
+                for log in area_logs[-5:]:
+                    total, count = recent_symptoms.get(log['symptom_name'], (0, 0))
+                    recent_symptoms[log['symptom_name']] = (total + log['severity'], count + 1)
                 
-                text += "🔍 **Recent Symptoms:**\n"
-                for symptom, severities in recent_symptoms.items():
-                    avg_severity = sum(severities) / len(severities)
-                    text += f"• {symptom}: {avg_severity:.1f}/5 avg\n"
-                text += "\n"
+                parts.append("🔍 **Recent Symptoms:**\n")
+                parts.extend(
+                    f"• {symptom}: {total / count:.1f}/5 avg\n"
+                    for symptom, (total, count) in recent_symptoms.items()
+                )
+                parts.append("\n")
             
-            text += "*💡 Tip:* Keep logging to see improvement trends and get personalized recommendations!"
+            parts.append(
+                "*💡 Tip:* Keep logging to see improvement trends and get personalized recommendations!"
+            )
+        text = "".join(parts)
 
         keyboard = [
-            [InlineKeyboardButton("📝 Log for this Area", callback_data=f"area_log_{area_name.replace(' ', '_')}")],
+            [InlineKeyboardButton("📝 Log for this Area", callback_data=f"area_log_{area_name.translate(_SLUG)}")],
             [InlineKeyboardButton("⬅️ Back to Areas", callback_data="area_management")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+        self._send(query, text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
 
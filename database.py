@@ -1,8 +1,12 @@
 import os
 import asyncio
+import functools
 import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone as dt_timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from telegram import File
 
@@ -16,6 +20,43 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Worker threads available for blocking Supabase calls; the underlying
+# httpx client keeps its own keep-alive connection pool.
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 50))
+
+# Shared by every Database instance in the process so per-request instances
+# (e.g. the timeline API) don't each spin up their own workers.
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
+
+# How long a users row may be served from memory, and how many to keep.
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_MAX = 10_000
+
+# Product and trigger lists behind the logging keyboards
+CATALOG_CACHE_TTL = 60
+
+# Today's per-type log counts shown by the daily check-in
+TODAY_LOGS_TTL = 60
+# User data categories offered by the settings screen and their tables
+USER_DATA_TABLES = {
+    'photos': 'photo_logs',
+    'products': 'product_logs',
+    'triggers': 'trigger_logs',
+    'symptoms': 'symptom_logs',
+    'moods': 'daily_mood_logs',
+    'kpis': 'skin_kpis',
+}
+TODAY_LOG_TABLES = {
+    'photo_logs': 'photo_count',
+    'daily_mood_logs': 'mood_count',
+    'symptom_logs': 'symptom_count',
+    'product_logs': 'product_count',
+}
+
+# PostgREST's error code for an RPC function that doesn't exist, i.e. one
+# whose migration hasn't been run yet
+MISSING_FUNCTION_CODE = 'PGRST202'
+
 class Database:
     def __init__(self):
         self.service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -28,6 +69,31 @@ class Database:
         # This prevents blocking API calls during import
         self._bucket_ensured = False
 
+        # get_user_logs results keyed by (telegram_id, days), valid for the
+        # current wall-clock minute only; see _logs_cache_bucket.
+        self._logs_cache: Dict[Tuple[int, int], Dict[str, List[Dict[str, Any]]]] = {}
+        self._logs_cache_bucket = 0
+        # telegram_id -> number of times the user's logs were invalidated, so
+        # a fetch that overlaps a new log doesn't cache what it read
+        self._logs_generation: Dict[int, int] = {}
+
+        # telegram_id -> users.id; the mapping never changes once a row exists
+        self._user_ids: Dict[int, Any] = {}
+
+        # telegram_id -> (expires_at, users row); dropped on every users write
+        self._users: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+        # telegram_id -> (expires_at, date, counts); dropped with the logs cache
+        self._today_logs: Dict[int, Tuple[float, str, Dict[str, int]]] = {}
+        # Cleared if the get_today_log_counts function hasn't been migrated
+        self._today_counts_rpc = True
+        # Cleared if the add_and_log_* functions haven't been migrated
+        self._add_and_log_rpc = True
+
+        # (table, telegram_id) -> (expires_at, products/triggers rows visible
+        # to the user); dropped when the bot writes to that table for them
+        self._catalog: Dict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]] = {}
+
     def _ensure_photo_bucket(self) -> None:
         """Ensure that the photo storage bucket exists."""
         bucket_name = 'skin-photos'
@@ -67,7 +133,7 @@ class Database:
         )
         try:
             # Test connection
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('users').select('id').limit(1).execute
             )
             logger.info("Database connection established successfully")
@@ -75,7 +141,7 @@ class Database:
             # Ensure photo bucket exists (moved from __init__ to prevent blocking during import)
             if not self._bucket_ensured and self.service_role_key:
                 logger.info("Ensuring Supabase storage bucket exists")
-                await asyncio.to_thread(self._ensure_photo_bucket)
+                await self.run(self._ensure_photo_bucket)
                 self._bucket_ensured = True
             elif not self.service_role_key:
                 logger.warning("No service role key found. Storage bucket creation will be skipped. Please create 'skin-photos' bucket manually in Supabase Dashboard.")
@@ -84,9 +150,15 @@ class Database:
         except Exception as e:
             logger.exception("Database initialization failed")
             raise
+    async def run(self, func, *args):
+        """Run a blocking Supabase call on the shared database thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_db_executor, functools.partial(func, *args))
+
     async def close(self):
         """Close database connection."""
-        # Supabase client doesn't need explicit closing
+        # Supabase client doesn't need explicit closing; the worker pool is
+        # process-wide and outlives any single instance
         logger.info("Database connection closed")
 
     async def create_user(
@@ -107,9 +179,10 @@ class Database:
         fields are only modified if explicitly provided to avoid
         overwriting existing preferences.
         """
+        self._invalidate_user(telegram_id)
         try:
             # Check if user already exists
-            existing_user = await asyncio.to_thread(
+            existing_user = await self.run(
                 self.client.table('users').select('*').eq('telegram_id', telegram_id).execute
             )
 
@@ -127,7 +200,7 @@ class Database:
                 if reminder_time is not None:
                     user_data['reminder_time'] = reminder_time
 
-                response = await asyncio.to_thread(
+                response = await self.run(
                     self.client.table('users').update(user_data).eq('telegram_id', telegram_id).execute
                 )
                 logger.info(f"Updated user: {telegram_id}")
@@ -145,7 +218,7 @@ class Database:
                     'updated_at': datetime.now(dt_timezone.utc).isoformat()
                 }
                 
-                response = await asyncio.to_thread(
+                response = await self.run(
                     self.client.table('users').insert(user_data).execute
                 )
                 logger.info(f"Created new user: {telegram_id}")
@@ -156,16 +229,55 @@ class Database:
             raise
 
     async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
-        """Get user by Telegram ID."""
+        """Get user by Telegram ID.
+
+        Rows are cached for ``USER_CACHE_TTL`` seconds since menu taps look
+        the same user up repeatedly. Writes to ``users`` go through
+        ``_invalidate_user``, and updates that return the row re-cache it.
+        """
+        now = time.monotonic()
+        cached = self._users.get(telegram_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
         try:
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('users').select('*').eq('telegram_id', telegram_id).execute
             )
-            return response.data[0] if response.data else None
         except Exception as e:
             logger.exception(f"Error getting user {telegram_id}")
             return None
 
+        if not response.data:
+            return None
+        user = response.data[0]
+        self._cache_user(telegram_id, user)
+        return user
+
+    def _cache_user(self, telegram_id: int, user: Dict[str, Any]) -> None:
+        """Store a fresh ``users`` row, such as the one an update returns."""
+        if len(self._users) >= USER_CACHE_MAX:
+            self._users.clear()
+        self._users[telegram_id] = (time.monotonic() + USER_CACHE_TTL, user)
+
+    def _invalidate_user(self, telegram_id: int) -> None:
+        """Drop the cached ``users`` row before it is written."""
+        self._users.pop(telegram_id, None)
+
+    async def _get_user_id(self, telegram_id: int) -> Optional[Any]:
+        """Return the internal ``users.id`` for a Telegram ID.
+
+        The hot ``log_*`` inserts only need the primary key, so it is cached
+        after the first lookup instead of re-reading the full row per insert.
+        """
+        user_id = self._user_ids.get(telegram_id)
+        if user_id is None:
+            user = await self.get_user_by_telegram_id(telegram_id)
+            if not user:
+                return None
+            user_id = self._user_ids[telegram_id] = user['id']
+        return user_id
+
     async def update_user_reminder(
         self, telegram_id: int, reminder_time: str, timezone: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -178,7 +290,8 @@ class Database:
             if timezone is not None:
                 update_data['timezone'] = timezone
 
-            response = await asyncio.to_thread(
+            self._invalidate_user(telegram_id)
+            response = await self.run(
                 self.client
                 .table('users')
                 .update(update_data)
@@ -186,6 +299,8 @@ class Database:
                 .execute
             )
             logger.info(f"Updated reminder time for user {telegram_id} to {reminder_time}")
+            # The update returns the whole row, so later reads need no SELECT
+            self._cache_user(telegram_id, response.data[0])
             return response.data[0]
         except Exception as e:
             logger.exception(f"Error updating reminder time for user {telegram_id}")
@@ -194,7 +309,7 @@ class Database:
     async def get_users_with_reminders(self) -> List[Dict[str, Any]]:
         """Return all users along with their reminder settings."""
         try:
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client
                 .table('users')
                 .select('telegram_id, reminder_time, timezone')
@@ -205,20 +320,41 @@ class Database:
             logger.exception("Error fetching user reminders")
             return []
 
+    async def _get_catalog(self, table: str, telegram_id: int) -> List[Dict[str, Any]]:
+        """Return a user's own and global rows from ``products`` or ``triggers``.
+
+        Rows are cached for ``CATALOG_CACHE_TTL`` seconds since every logging
+        keyboard reads them; callers must not mutate the returned list.
+        """
+        key = (table, telegram_id)
+        cached = self._catalog.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        user = await self.get_user_by_telegram_id(telegram_id)
+        if not user:
+            return []
+        response = await self.run(
+            self.client
+            .table(table)
+            .select('*')
+            .or_(f'user_id.eq.{user["id"]},is_global.eq.true')
+            .execute
+        )
+        rows = response.data or []
+        if len(self._catalog) >= USER_CACHE_MAX:
+            self._catalog.clear()
+        self._catalog[key] = (time.monotonic() + CATALOG_CACHE_TTL, rows)
+        return rows
+
+    def _invalidate_catalog(self, table: str, telegram_id: int) -> None:
+        """Drop a user's cached ``products`` or ``triggers`` rows."""
+        self._catalog.pop((table, telegram_id), None)
+
     async def get_products(self, user_id: int) -> List[Dict[str, Any]]:
         """Retrieve products for a user including global ones."""
         try:
-            user = await self.get_user_by_telegram_id(user_id)
-            if not user:
-                return []
-            response = await asyncio.to_thread(
-                self.client
-                .table('products')
-                .select('*')
-                .or_(f'user_id.eq.{user["id"]},is_global.eq.true')
-                .execute
-            )
-            return response.data
+            return await self._get_catalog('products', user_id)
         except Exception as e:
             logger.error(f"Error retrieving products for user {user_id}: {e}")
             return []
@@ -237,9 +373,10 @@ class Database:
                 'type': product_type,
                 'is_global': is_global,
             }
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('products').insert(data).execute
             )
+            self._invalidate_catalog('products', user_id)
             return response.data[0]
         except Exception as e:
             logger.error(f"Error adding product for user {user_id}: {e}")
@@ -248,17 +385,7 @@ class Database:
     async def get_triggers(self, user_id: int) -> List[Dict[str, Any]]:
         """Retrieve triggers for a user including global ones."""
         try:
-            user = await self.get_user_by_telegram_id(user_id)
-            if not user:
-                return []
-            response = await asyncio.to_thread(
-                self.client
-                .table('triggers')
-                .select('*')
-                .or_(f'user_id.eq.{user["id"]},is_global.eq.true')
-                .execute
-            )
-            return response.data
+            return await self._get_catalog('triggers', user_id)
         except Exception as e:
             logger.error(f"Error retrieving triggers for user {user_id}: {e}")
             return []
@@ -277,21 +404,66 @@ class Database:
                 'emoji': emoji,
                 'is_global': is_global,
             }
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('triggers').insert(data).execute
             )
+            self._invalidate_catalog('triggers', user_id)
             return response.data[0]
         except Exception as e:
             logger.error(f"Error adding trigger for user {user_id}: {e}")
             raise
 
+    async def _add_and_log(self, table: str, telegram_id: int, name: str) -> None:
+        """Add a ``products`` or ``triggers`` row and log one use of it.
+
+        Uses the ``add_and_log_*`` function from add_and_log_migration.sql
+        when it exists, so both inserts share one round-trip; otherwise the
+        row is added first and then logged, so a failed add logs nothing.
+        """
+        if self._add_and_log_rpc:
+            db_user_id = await self._get_user_id(telegram_id)
+            if db_user_id is None:
+                raise ValueError(f"User {telegram_id} not found")
+            try:
+                await self.run(
+                    self.client.rpc(
+                        f'add_and_log_{table[:-1]}', {'p_user_id': db_user_id, 'p_name': name}
+                    ).execute
+                )
+            except Exception as e:
+                # Only a missing function falls back; other errors may have
+                # come after the inserts and must not be retried
+                if getattr(e, 'code', None) != MISSING_FUNCTION_CODE:
+                    raise
+                self._add_and_log_rpc = False
+                logger.warning(f"add_and_log_{table[:-1]} unavailable, inserting separately: {e}")
+            else:
+                self._invalidate_catalog(table, telegram_id)
+                self._invalidate_user_logs(telegram_id)
+                return
+
+        if table == 'products':
+            await self.add_product(telegram_id, name)
+            await self.log_product(telegram_id, name)
+        else:
+            await self.add_trigger(telegram_id, name)
+            await self.log_trigger(telegram_id, name)
+
+    async def add_and_log_product(self, user_id: int, name: str) -> None:
+        """Add a custom product and log one use of it."""
+        await self._add_and_log('products', user_id, name)
+
+    async def add_and_log_trigger(self, user_id: int, name: str) -> None:
+        """Add a custom trigger and log one use of it."""
+        await self._add_and_log('triggers', user_id, name)
+
     async def get_conditions(self, user_id: int) -> List[Dict[str, Any]]:
         """Retrieve conditions for a user."""
         try:
             user = await self.get_user_by_telegram_id(user_id)
             if not user:
                 return []
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client
                 .table('conditions')
                 .select('*')
@@ -314,7 +486,7 @@ class Database:
                 'name': name,
                 'condition_type': condition_type,
             }
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('conditions').insert(data).execute
             )
             return response.data[0]
@@ -327,22 +499,22 @@ class Database:
     ) -> Dict[str, Any]:
         """Log a product usage."""
         try:
-            # Get user
-            user = await self.get_user_by_telegram_id(user_id)
-            if not user:
+            db_user_id = await self._get_user_id(user_id)
+            if db_user_id is None:
                 raise ValueError(f"User {user_id} not found")
 
             product_data = {
-                'user_id': user['id'],
+                'user_id': db_user_id,
                 'product_name': product_name,
                 'effect': effect,
                 'notes': notes,
                 'logged_at': datetime.now(dt_timezone.utc).isoformat()
             }
 
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('product_logs').insert(product_data).execute
             )
+            self._invalidate_user_logs(user_id)
             logger.info(f"Logged product for user {user_id}: {product_name}")
             return response.data[0]
             
@@ -355,21 +527,21 @@ class Database:
     ) -> Dict[str, Any]:
         """Log a trigger."""
         try:
-            # Get user
-            user = await self.get_user_by_telegram_id(user_id)
-            if not user:
+            db_user_id = await self._get_user_id(user_id)
+            if db_user_id is None:
                 raise ValueError(f"User {user_id} not found")
 
             trigger_data = {
-                'user_id': user['id'],
+                'user_id': db_user_id,
                 'trigger_name': trigger_name,
                 'notes': notes,
                 'logged_at': datetime.now(dt_timezone.utc).isoformat()
             }
             
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('trigger_logs').insert(trigger_data).execute
             )
+            self._invalidate_user_logs(user_id)
             logger.info(f"Logged trigger for user {user_id}: {trigger_name}")
             return response.data[0]
             
@@ -381,28 +553,63 @@ class Database:
         self, user_id: int, symptom_name: str, severity: int, notes: Optional[str] = None
     ) -> Dict[str, Any]:
         """Log a symptom."""
+        logged = await self.log_symptoms(user_id, [symptom_name], severity, notes)
+        return logged[0]
+
+    async def log_triggers(self, user_id: int, trigger_names: List[str]) -> List[Dict[str, Any]]:
+        """Log several triggers in a single insert."""
         try:
-            # Get user
-            user = await self.get_user_by_telegram_id(user_id)
-            if not user:
+            db_user_id = await self._get_user_id(user_id)
+            if db_user_id is None:
                 raise ValueError(f"User {user_id} not found")
 
-            symptom_data = {
-                'user_id': user['id'],
-                'symptom_name': symptom_name,
-                'severity': severity,
-                'notes': notes,
-                'logged_at': datetime.now(dt_timezone.utc).isoformat(),
-            }
+            logged_at = datetime.now(dt_timezone.utc).isoformat()
+            rows = [
+                {'user_id': db_user_id, 'trigger_name': name, 'notes': None, 'logged_at': logged_at}
+                for name in trigger_names
+            ]
 
-            response = await asyncio.to_thread(
-                self.client.table('symptom_logs').insert(symptom_data).execute
-            )
-            logger.info(f"Logged symptom for user {user_id}: {symptom_name}")
-            return response.data[0]
+            response = await self.run(self.client.table('trigger_logs').insert(rows).execute)
+            self._invalidate_user_logs(user_id)
+            logger.info(f"Logged {len(rows)} triggers for user {user_id}")
+            return response.data
 
         except Exception as e:
-            logger.error(f"Error logging symptom for user {user_id}: {e}")
+            logger.error(f"Error logging triggers for user {user_id}: {e}")
+            raise
+
+    async def log_symptoms(
+        self,
+        user_id: int,
+        symptom_names: List[str],
+        severity: int,
+        notes: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Log several symptoms with the same severity in a single insert."""
+        try:
+            db_user_id = await self._get_user_id(user_id)
+            if db_user_id is None:
+                raise ValueError(f"User {user_id} not found")
+
+            logged_at = datetime.now(dt_timezone.utc).isoformat()
+            rows = [
+                {
+                    'user_id': db_user_id,
+                    'symptom_name': name,
+                    'severity': severity,
+                    'notes': notes,
+                    'logged_at': logged_at,
+                }
+                for name in symptom_names
+            ]
+
+            response = await self.run(self.client.table('symptom_logs').insert(rows).execute)
+            self._invalidate_user_logs(user_id)
+            logger.info(f"Logged {len(rows)} symptoms for user {user_id}")
+            return response.data
+
+        except Exception as e:
+            logger.error(f"Error logging symptoms for user {user_id}: {e}")
             raise
 
     async def save_photo(self, user_id: int, file: File) -> tuple[str, str, str]:
@@ -413,21 +620,21 @@ class Database:
     async def log_photo(self, user_id: int, photo_url: str, analysis: str = None) -> Dict[str, Any]:
         """Log a photo with optional AI analysis."""
         try:
-            # Get user
-            user = await self.get_user_by_telegram_id(user_id)
-            if not user:
+            db_user_id = await self._get_user_id(user_id)
+            if db_user_id is None:
                 raise ValueError(f"User {user_id} not found")
             
             photo_data = {
-                'user_id': user['id'],
+                'user_id': db_user_id,
                 'photo_url': photo_url,
                 'ai_analysis': analysis,
                 'logged_at': datetime.now(dt_timezone.utc).isoformat()
             }
             
-            response = await asyncio.to_thread(
+            response = await self.run(
                 self.client.table('photo_logs').insert(photo_data).execute
             )
+            self._invalidate_user_logs(user_id)
             logger.info(f"Logged photo for user {user_id}")
             return response.data[0]
             
@@ -435,8 +642,34 @@ class Database:
             logger.error(f"Error logging photo for user {user_id}: {e}")
             raise
 
+    def _invalidate_user_logs(self, user_id: int) -> None:
+        """Drop cached log queries for a user after one of their logs changes."""
+        for key in [k for k in self._logs_cache if k[0] == user_id]:
+            del self._logs_cache[key]
+        self._logs_generation[user_id] = self._logs_generation.get(user_id, 0) + 1
+        self._today_logs.pop(user_id, None)
+
+    @staticmethod
+    def _copy_logs(logs: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Copy a cached logs dict so callers can't change the cached lists."""
+        return {kind: list(rows) for kind, rows in logs.items()}
+
     async def get_user_logs(self, user_id: int, days: int = 7) -> Dict[str, List[Dict[str, Any]]]:
-        """Get all user logs from the past N days."""
+        """Get all user logs from the past N days.
+
+        Results are cached until the end of the current minute (or until the
+        user logs something new) so repeated /summary and /progress presses
+        share one set of queries.
+        """
+        bucket = int(time.time() // 60)
+        if bucket != self._logs_cache_bucket:
+            self._logs_cache.clear()
+            self._logs_cache_bucket = bucket
+        cached = self._logs_cache.get((user_id, days))
+        if cached is not None:
+            return self._copy_logs(cached)
+        generation = self._logs_generation.get(user_id, 0)
+
         try:
             # Get user
             user = await self.get_user_by_telegram_id(user_id)
@@ -458,18 +691,24 @@ class Database:
                 )
 
             product_logs, trigger_logs, symptom_logs, photo_logs = await asyncio.gather(
-                asyncio.to_thread(fetch_logs, 'product_logs'),
-                asyncio.to_thread(fetch_logs, 'trigger_logs'),
-                asyncio.to_thread(fetch_logs, 'symptom_logs'),
-                asyncio.to_thread(fetch_logs, 'photo_logs'),
+                self.run(fetch_logs, 'product_logs'),
+                self.run(fetch_logs, 'trigger_logs'),
+                self.run(fetch_logs, 'symptom_logs'),
+                self.run(fetch_logs, 'photo_logs'),
             )
 
-            return {
+            logs = {
                 'products': product_logs,
                 'triggers': trigger_logs,
                 'symptoms': symptom_logs,
                 'photos': photo_logs
             }
+            if (
+                self._logs_generation.get(user_id, 0) == generation
+                and self._logs_cache_bucket == bucket
+            ):
+                self._logs_cache[(user_id, days)] = self._copy_logs(logs)
+            return logs
             
         except Exception as e:
             logger.error(f"Error getting logs for user {user_id}: {e}")
@@ -530,12 +769,15 @@ class Database:
             user_id = user['id']
             
             # Insert mood log
-            result = self.client.table('daily_mood_logs').insert({
-                'user_id': user_id,
-                'mood_rating': mood_rating,
-                'mood_description': mood_description
-            }).execute()
+            result = await self.run(
+                self.client.table('daily_mood_logs').insert({
+                    'user_id': user_id,
+                    'mood_rating': mood_rating,
+                    'mood_description': mood_description
+                }).execute
+            )
             
+            self._invalidate_user_logs(telegram_id)
             logger.info(f"Logged daily mood for user {telegram_id}: {mood_description} ({mood_rating})")
             return True
             
@@ -556,7 +798,7 @@ class Database:
             def fetch_mood_logs():
                 return self.client.table('daily_mood_logs').select('*').eq('user_id', user_id).gte('logged_at', cutoff_date).order('logged_at', desc=True).execute()
             
-            result = await asyncio.to_thread(fetch_mood_logs)
+            result = await self.run(fetch_mood_logs)
             return result.data
             
         except Exception as e:
@@ -572,7 +814,7 @@ class Database:
                 return {
                     'total_entries': 0,
                     'average_rating': 0,
-                    'mood_distribution': {},
+                    'mood_distribution': Counter(),
                     'trend': 'No data'
                 }
             
@@ -581,10 +823,7 @@ class Database:
             average_rating = sum(log['mood_rating'] for log in mood_logs) / total_entries
             
             # Count mood distribution
-            mood_distribution = {}
-            for log in mood_logs:
-                desc = log['mood_description']
-                mood_distribution[desc] = mood_distribution.get(desc, 0) + 1
+            mood_distribution = Counter(log['mood_description'] for log in mood_logs)
             
             # Calculate trend (recent vs older entries)
             half_point = total_entries // 2
@@ -623,10 +862,13 @@ class Database:
             user_id = user['id']
             
             # Update in products table
-            result = self.client.table('products').update({
-                'name': new_name
-            }).eq('user_id', user_id).eq('name', old_name).execute()
+            result = await self.run(
+                self.client.table('products').update({
+                    'name': new_name
+                }).eq('user_id', user_id).eq('name', old_name).execute
+            )
             
+            self._invalidate_catalog('products', telegram_id)
             logger.info(f"Updated product name for user {telegram_id}: {old_name} -> {new_name}")
             return True
             
@@ -645,8 +887,11 @@ class Database:
             user_id = user['id']
             
             # Delete from products table
-            result = self.client.table('products').delete().eq('user_id', user_id).eq('name', product_name).execute()
+            result = await self.run(
+                self.client.table('products').delete().eq('user_id', user_id).eq('name', product_name).execute
+            )
             
+            self._invalidate_catalog('products', telegram_id)
             logger.info(f"Deleted product for user {telegram_id}: {product_name}")
             return True
             
@@ -655,7 +900,11 @@ class Database:
             return False
 
     async def delete_all_user_data(self, telegram_id: int, data_types: List[str]) -> Dict[str, bool]:
-        """Delete specified types of user data."""
+        """Delete specified types of user data.
+
+        The tables are independent, so the deletes run concurrently; the
+        result maps each requested type to whether its delete succeeded.
+        """
         try:
             user = await self.get_user_by_telegram_id(telegram_id)
             if not user:
@@ -663,32 +912,28 @@ class Database:
                 return {}
 
             user_id = user['id']
-            results = {}
-            
-            # Define table mappings
-            table_mapping = {
-                'photos': 'photo_logs',
-                'products': 'product_logs', 
-                'triggers': 'trigger_logs',
-                'symptoms': 'symptom_logs',
-                'moods': 'daily_mood_logs',
-                'kpis': 'skin_kpis'
-            }
-            
-            for data_type in data_types:
-                if data_type in table_mapping:
-                    table_name = table_mapping[data_type]
-                    try:
-                        self.client.table(table_name).delete().eq('user_id', user_id).execute()
-                        results[data_type] = True
-                        logger.info(f"Deleted {data_type} data for user {telegram_id}")
-                    except Exception as e:
-                        logger.error(f"Error deleting {data_type} for user {telegram_id}: {e}")
-                        results[data_type] = False
-                else:
-                    results[data_type] = False
-            
-            return results
+
+            async def delete(data_type: str) -> bool:
+                table_name = USER_DATA_TABLES.get(data_type)
+                if table_name is None:
+                    return False
+                try:
+                    await self.run(
+                        self.client.table(table_name).delete().eq('user_id', user_id).execute
+                    )
+                except Exception as e:
+                    logger.error(f"Error deleting {data_type} for user {telegram_id}: {e}")
+                    return False
+                logger.info(f"Deleted {data_type} data for user {telegram_id}")
+                return True
+
+            try:
+                outcomes = await asyncio.gather(*(delete(data_type) for data_type in data_types))
+            finally:
+                # After the deletes, so a read that overlapped them can't
+                # cache rows that are now gone
+                self._invalidate_user_logs(telegram_id)
+            return dict(zip(data_types, outcomes))
             
         except Exception as e:
             logger.error(f"Error deleting data for user {telegram_id}: {e}")
@@ -703,30 +948,20 @@ class Database:
 
             user_id = user['id']
             
-            # Count data in each table
+            # Count data in each table; the counts are independent, so run them together
             def count_table_data(table_name):
                 result = self.client.table(table_name).select('id', count='exact').eq('user_id', user_id).execute()
                 return result.count if hasattr(result, 'count') else len(result.data)
-            
-            summary = {}
-            tables = {
-                'photos': 'photo_logs',
-                'products': 'product_logs',
-                'triggers': 'trigger_logs', 
-                'symptoms': 'symptom_logs',
-                'moods': 'daily_mood_logs',
-                'kpis': 'skin_kpis'
-            }
-            
-            for data_type, table_name in tables.items():
+
+            async def count(data_type: str, table_name: str) -> int:
                 try:
-                    count = await asyncio.to_thread(count_table_data, table_name)
-                    summary[data_type] = count
+                    return await self.run(count_table_data, table_name)
                 except Exception as e:
                     logger.error(f"Error counting {data_type}: {e}")
-                    summary[data_type] = 0
-            
-            return summary
+                    return 0
+
+            counts = await asyncio.gather(*(count(*item) for item in USER_DATA_TABLES.items()))
+            return dict(zip(USER_DATA_TABLES, counts))
             
         except Exception as e:
             logger.error(f"Error getting data summary for user {telegram_id}: {e}")
@@ -736,66 +971,73 @@ class Database:
 
     async def update_user_onboarding_status(self, telegram_id: int, completed: bool) -> bool:
         """Update user's onboarding completion status."""
+        self._invalidate_user(telegram_id)
         try:
             def update_onboarding():
-                result = self.client.table('users').update({
+                return self.client.table('users').update({
                     'onboarding_completed': completed
                 }).eq('telegram_id', telegram_id).execute()
-                return len(result.data) > 0
-            
-            return await asyncio.to_thread(update_onboarding)
+
+            result = await self.run(update_onboarding)
+            if result.data:
+                self._cache_user(telegram_id, result.data[0])
+            return len(result.data) > 0
         except Exception as e:
             logger.error(f"Error updating onboarding status for user {telegram_id}: {e}")
             return False
 
     async def get_today_logs(self, telegram_id: int) -> Dict[str, int]:
-        """Get count of today's logs for a user."""
+        """Get count of today's logs for a user.
+
+        Counts are cached for ``TODAY_LOGS_TTL`` seconds and dropped whenever
+        the user logs something.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        cached = self._today_logs.get(telegram_id)
+        if cached is not None and cached[0] > time.monotonic() and cached[1] == today:
+            return cached[2]
+
         try:
             user = await self.get_user_by_telegram_id(telegram_id)
             if not user:
                 return {}
                 
             user_id = user['id']
-            today = datetime.now().strftime('%Y-%m-%d')
             
+            since = f'{today}T00:00:00'
+
             def count_today_logs():
+                # One round-trip when the get_today_log_counts function exists
+                if self._today_counts_rpc:
+                    try:
+                        rows = self.client.rpc(
+                            'get_today_log_counts', {'p_user_id': user_id, 'p_since': since}
+                        ).execute().data
+                        return {key: rows[0].get(key) or 0 for key in TODAY_LOG_TABLES.values()}
+                    except Exception as e:
+                        # Only a missing function turns the RPC off; any other
+                        # failure falls back for this call alone
+                        if getattr(e, 'code', None) == MISSING_FUNCTION_CODE:
+                            self._today_counts_rpc = False
+                            logger.warning(f"get_today_log_counts unavailable, counting per table: {e}")
+                        else:
+                            logger.warning(f"get_today_log_counts failed, counting per table: {e}")
+
                 results = {}
-                
-                # Count photos
-                try:
-                    photo_result = self.client.table('photo_logs').select('id', count='exact').eq('user_id', user_id).gte('logged_at', f'{today}T00:00:00').execute()
-                    results['photo_count'] = photo_result.count if hasattr(photo_result, 'count') else len(photo_result.data)
-                except Exception as e:
-                    logger.error(f"Error counting today's photo_count: {e}")
-                    results['photo_count'] = 0
-                
-                # Count mood logs
-                try:
-                    mood_result = self.client.table('daily_mood_logs').select('id', count='exact').eq('user_id', user_id).gte('logged_at', f'{today}T00:00:00').execute()
-                    results['mood_count'] = mood_result.count if hasattr(mood_result, 'count') else len(mood_result.data)
-                except Exception as e:
-                    logger.error(f"Error counting today's mood_count: {e}")
-                    results['mood_count'] = 0
-                
-                # Count symptoms
-                try:
-                    symptom_result = self.client.table('symptom_logs').select('id', count='exact').eq('user_id', user_id).gte('logged_at', f'{today}T00:00:00').execute()
-                    results['symptom_count'] = symptom_result.count if hasattr(symptom_result, 'count') else len(symptom_result.data)
-                except Exception as e:
-                    logger.error(f"Error counting today's symptom_count: {e}")
-                    results['symptom_count'] = 0
-                
-                # Count products
-                try:
-                    product_result = self.client.table('product_logs').select('id', count='exact').eq('user_id', user_id).gte('logged_at', f'{today}T00:00:00').execute()
-                    results['product_count'] = product_result.count if hasattr(product_result, 'count') else len(product_result.data)
-                except Exception as e:
-                    logger.error(f"Error counting today's product_count: {e}")
-                    results['product_count'] = 0
-                
+                for table, key in TODAY_LOG_TABLES.items():
+                    try:
+                        result = self.client.table(table).select('id', count='exact').eq('user_id', user_id).gte('logged_at', since).execute()
+                        results[key] = result.count if hasattr(result, 'count') else len(result.data)
+                    except Exception as e:
+                        logger.error(f"Error counting today's {key}: {e}")
+                        results[key] = 0
                 return results
-            
-            return await asyncio.to_thread(count_today_logs)
+
+            counts = await self.run(count_today_logs)
+            if len(self._today_logs) >= USER_CACHE_MAX:
+                self._today_logs.clear()
+            self._today_logs[telegram_id] = (time.monotonic() + TODAY_LOGS_TTL, today, counts)
+            return counts
             
         except Exception as e:
             logger.error(f"Error getting today's logs for user {telegram_id}: {e}")
@@ -814,7 +1056,7 @@ class Database:
                 result = self.client.table('user_areas').select('*').eq('user_id', user_id).order('created_at').execute()
                 return result.data
             
-            return await asyncio.to_thread(get_areas)
+            return await self.run(get_areas)
             
         except Exception as e:
             logger.error(f"Error getting user areas for {telegram_id}: {e}")
@@ -837,12 +1079,27 @@ class Database:
                 }).execute()
                 return len(result.data) > 0
             
-            return await asyncio.to_thread(create_area)
+            return await self.run(create_area)
             
         except Exception as e:
             logger.error(f"Error creating area {area_name} for user {telegram_id}: {e}")
             return False
 
+    async def create_user_areas(self, telegram_id: int, area_names: List[str]) -> int:
+        """Create several tracking areas in one insert; return how many were saved."""
+        try:
+            user_id = await self._get_user_id(telegram_id)
+            if user_id is None:
+                return 0
+
+            rows = [{'user_id': user_id, 'name': name, 'description': None} for name in area_names]
+            result = await self.run(self.client.table('user_areas').insert(rows).execute)
+            return len(result.data)
+
+        except Exception as e:
+            logger.error(f"Error creating areas {area_names} for user {telegram_id}: {e}")
+            return 0
+
     async def get_area_logs(self, telegram_id: int, area_name: str, days: int = 30) -> List[Dict[str, Any]]:
         """Get logs for a specific area."""
         try:
@@ -857,7 +1114,7 @@ class Database:
                 result = self.client.table('symptom_logs').select('*').eq('user_id', user_id).eq('area', area_name).gte('logged_at', since_date).order('logged_at', desc=True).execute()
                 return result.data
             
-            return await asyncio.to_thread(get_logs)
+            return await self.run(get_logs)
             
         except Exception as e:
             logger.error(f"Error getting area logs for {area_name} for user {telegram_id}: {e}")
@@ -877,7 +1134,7 @@ class Database:
                 result = self.client.table('photo_logs').select('*').eq('user_id', user_id).eq('area', area_name).gte('logged_at', since_date).order('logged_at', desc=True).execute()
                 return result.data
             
-            return await asyncio.to_thread(get_photos)
+            return await self.run(get_photos)
             
         except Exception as e:
             logger.error(f"Error getting area photos for {area_name} for user {telegram_id}: {e}")
@@ -887,13 +1144,16 @@ class Database:
 
     async def update_user_onboarding_status(self, telegram_id: int, completed: bool) -> bool:
         """Update user's onboarding completion status."""
+        self._invalidate_user(telegram_id)
         try:
-            result = await asyncio.to_thread(
+            result = await self.run(
                 lambda: self.client.table('users')
                 .update({'onboarding_completed': completed})
                 .eq('telegram_id', telegram_id)
                 .execute()
             )
+            if result.data:
+                self._cache_user(telegram_id, result.data[0])
             return len(result.data) > 0
         except Exception as e:
             logger.error(f"Error updating onboarding status for user {telegram_id}: {e}")
@@ -908,7 +1168,7 @@ class Database:
             
             user_id = user['id']
             
-            result = await asyncio.to_thread(
+            result = await self.run(
                 lambda: self.client.table('user_areas')
                 .select('*')
                 .eq('user_id', user_id)
@@ -938,7 +1198,7 @@ class Database:
             user_id = user['id']
             since_date = (datetime.now() - timedelta(days=days)).isoformat()
             
-            result = await asyncio.to_thread(
+            result = await self.run(
                 lambda: self.client.table('symptom_logs')
                 .select('*')
                 .eq('user_id', user_id)
@@ -964,7 +1224,7 @@ class Database:
             user_id = user['id']
             since_date = (datetime.now() - timedelta(days=days)).isoformat()
             
-            result = await asyncio.to_thread(
+            result = await self.run(
                 lambda: self.client.table('photo_logs')
                 .select('*')
                 .eq('user_id', user_id)
@@ -985,7 +1245,7 @@ class Database:
         try:
             since_date = (datetime.now() - timedelta(days=days)).isoformat()
             
-            result = await asyncio.to_thread(
+            result = await self.run(
                 lambda: self.client.table('symptom_logs')
                 .select('id', count='exact')
                 .eq('user_id', user_id)
@@ -4,6 +4,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import json
 
+import httpx
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 
@@ -14,12 +15,16 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
-    def __init__(self):
+    __slots__ = ("api_key", "client", "model")
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # Reuse the caller's keep-alive client when one is provided
+        client_kwargs = {"http_client": http_client} if http_client is not None else {}
+        self.client = AsyncOpenAI(api_key=self.api_key, **client_kwargs)
         self.model = "gpt-4"  # Use GPT-4 for better analysis
         logger.info(
             "OpenAIService configured (key_length=%s, railway_env=%s)",
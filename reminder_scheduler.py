@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 from types import SimpleNamespace
+from typing import Iterable, Tuple
+import functools
 import logging
 
 try:  # pragma: no cover - used when APScheduler is available
@@ -51,26 +53,26 @@ class ReminderScheduler:
     can run in the same asyncio event loop as ``python-telegram-bot``.
     Each job is identified by ``reminder_<chat_id>`` which allows
     replacing existing jobs when a user updates their reminder time.
+
+    Pass ``start=False`` to register many reminders first with
+    :meth:`schedule_daily_reminders` and then call :meth:`start`; jobs added
+    before the scheduler runs are queued and stored in a single pass.
     """
 
-    def __init__(self, bot: Bot):
+    __slots__ = ("bot", "scheduler", "logger")
+
+    def __init__(self, bot: Bot, start: bool = True):
         self.bot = bot
         self.scheduler = AsyncIOScheduler(timezone="UTC")
-        self.scheduler.start()
         self.logger = logging.getLogger(__name__)
+        if start:
+            self.start()
 
-    def schedule_daily_reminder(self, chat_id: int, reminder_time: str, timezone: str = "UTC") -> None:
-        """Schedule or reschedule a user's daily reminder.
+    def start(self) -> None:
+        """Start running scheduled jobs."""
+        self.scheduler.start()
 
-        Parameters
-        ----------
-        chat_id: int
-            Telegram chat identifier where the reminder will be sent.
-        reminder_time: str
-            Time in ``HH:MM`` format.
-        timezone: str
-            IANA timezone string, defaults to ``UTC``.
-        """
+    def _add_reminder_job(self, chat_id: int, reminder_time: str, timezone: str) -> None:
         hour, minute = map(int, reminder_time.split(":"))
         self.scheduler.add_job(
             self.send_daily_reminder,
@@ -82,6 +84,20 @@ class ReminderScheduler:
             id=f"reminder_{chat_id}",
             replace_existing=True,
         )
+
+    def schedule_daily_reminder(self, chat_id: int, reminder_time: str, timezone: str = "UTC") -> None:
+        """Schedule or reschedule a user's daily reminder.
+
+        Parameters
+        ----------
+        chat_id: int
+            Telegram chat identifier where the reminder will be sent.
+        reminder_time: str
+            Time in ``HH:MM`` format.
+        timezone: str
+            IANA timezone string, defaults to ``UTC``.
+        """
+        self._add_reminder_job(chat_id, reminder_time, timezone)
         self.logger.info(
             "Scheduled daily reminder for chat %s at %s (%s)",
             chat_id,
@@ -89,9 +105,27 @@ class ReminderScheduler:
             timezone,
         )
 
-    async def send_daily_reminder(self, chat_id: int) -> None:
-        """Send the daily reminder message with rating buttons."""
-        keyboard = [
+    def schedule_daily_reminders(self, reminders: Iterable[Tuple[int, str, str]]) -> int:
+        """Schedule many reminders at once and return how many were added.
+
+        Parameters
+        ----------
+        reminders: Iterable[Tuple[int, str, str]]
+            ``(chat_id, reminder_time, timezone)`` tuples, as accepted by
+            :meth:`schedule_daily_reminder`.
+        """
+        count = 0
+        for chat_id, reminder_time, timezone in reminders:
+            self._add_reminder_job(chat_id, reminder_time, timezone)
+            count += 1
+        self.logger.info("Scheduled %s daily reminders", count)
+        return count
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _rating_markup() -> InlineKeyboardMarkup:
+        """Rating buttons, built on first use and shared by every reminder."""
+        return InlineKeyboardMarkup([
             [
                 InlineKeyboardButton("😃 Excellent", callback_data="rating_5"),
                 InlineKeyboardButton("🙂 Good", callback_data="rating_4"),
@@ -103,9 +137,13 @@ class ReminderScheduler:
             [
                 InlineKeyboardButton("😫 Flare-up", callback_data="rating_1"),
             ],
-        ]
-        markup = InlineKeyboardMarkup(keyboard)
-        await self.bot.send_message(chat_id, "How does your skin feel today?", reply_markup=markup)
+        ])
+
+    async def send_daily_reminder(self, chat_id: int) -> None:
+        """Send the daily reminder message with rating buttons."""
+        await self.bot.send_message(
+            chat_id, "How does your skin feel today?", reply_markup=self._rating_markup()
+        )
 
     def remove_reminder(self, chat_id: int) -> None:
         """Remove a user's daily reminder.
@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, APIRouter
+from fastapi import FastAPI, Request, Response, HTTPException, BackgroundTasks, APIRouter
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
@@ -11,7 +11,10 @@ import hmac
 import secrets
 import time
 import logging
+import logging.handlers
+import atexit
 import json
+import queue
 import sqlite3
 
 import os
@@ -44,6 +47,12 @@ from telegram import Update
 if not os.getenv("CLOUDFLARE_WORKERS"):
     load_dotenv()
 
+# Faster webhook body parsing when orjson is installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 # Import Cloudflare database adapter
 try:
     from cloudflare_database import get_cloudflare_db
@@ -89,8 +98,15 @@ except PermissionError:
     # Railway doesn't allow file writing - use only console
     handlers = [handler]
 
+# Handlers do their blocking writes on a listener thread; the event loop
+# only enqueues records.
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 root_logger = logging.getLogger()
-root_logger.handlers = handlers
+root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
 root_logger.setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -125,6 +141,9 @@ class MockSkinHealthBot:
             update_data.get("update_id"),
         )
 
+    def webhook_reply(self, update_data):
+        return None
+
     async def set_webhook(self, url: str):
         logger.warning("MockSkinHealthBot.set_webhook skipped (url=%s)", url)
         return False
@@ -152,6 +171,7 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         logger.info("Starting Skin Health Tracker Bot server...")
+        logger.info("Event loop: %s", type(asyncio.get_running_loop()).__module__)
         logger.info(f"Environment check - Bot token available: {bool(TELEGRAM_BOT_TOKEN)}")
         logger.info(f"Environment check - Base URL: {BASE_URL}")
         logger.info(f"Environment check - OpenAI key available: {bool(os.getenv('OPENAI_API_KEY'))}")
@@ -373,7 +393,7 @@ async def telegram_auth(data: TelegramAuthRequest):
 async def webhook(request: Request, background_tasks: BackgroundTasks):
     try:
         started = time.perf_counter()
-        update_data = await request.json()
+        update_data = json_loads(await request.body())
         update_id = update_data.get("update_id")
         
         # Enhanced logging to see what type of update we're receiving
@@ -393,6 +413,12 @@ async def webhook(request: Request, background_tasks: BackgroundTasks):
             update_type = "callback"
             logger.info("[WEBHOOK] Callback query received - update_id=%s", update_id)
         
+        reply = bot.webhook_reply(update_data)
+        if reply is not None:
+            took = (time.perf_counter() - started) * 1000
+            logger.info("Webhook reply: update_id=%s in %.1fms", update_id, took)
+            return Response(content=reply, media_type="application/json")
+
         background_tasks.add_task(process_update_safe, update_data)
         took = (time.perf_counter() - started) * 1000
         logger.info("Webhook ack: update_id=%s type=%s in %.1fms", update_id, update_type, took)
@@ -527,7 +553,8 @@ if __name__ == "__main__":
         # This will only run in local development
         # Railway will use uvicorn command from railway.json
         logger.info(f"Starting server on {HOST}:{PORT}")
-        uvicorn.run("server:app", host=HOST, port=PORT, reload=False, log_level="info")
+        # "auto" picks uvloop when it is installed (not available on Windows)
+        uvicorn.run("server:app", host=HOST, port=PORT, reload=False, log_level="info", loop="auto")
     except Exception as e:
         logger.error(f"Failed to start server: {e}")
         raise
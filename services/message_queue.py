@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, List, Optional
+
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class EditOutbox:
+    """Deliver ``edit_message_text`` calls from a fixed set of sender tasks.
+
+    Edits are sharded by chat, so all edits to one chat share a queue and
+    reach Telegram in the order they were queued. An edit with a newer edit
+    to the same message queued behind it is skipped, since Telegram would
+    only replace it; that also drops stale edits held up by a flood wait.
+    """
+
+    __slots__ = ("_queues", "_senders", "_queued")
+
+    def __init__(self, shards: int, maxsize: int):
+        size = max(1, maxsize // shards)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=size) for _ in range(shards)]
+        self._senders: List[asyncio.Task] = []
+        # Message key -> how many of its edits are still queued
+        self._queued: Dict[Hashable, int] = {}
+
+    def start(self) -> None:
+        """Start one sender task per queue."""
+        self._senders = [asyncio.create_task(self._sender(queue)) for queue in self._queues]
+
+    def put(self, chat_id: int, key: Optional[Hashable], query: Any, text: str, kwargs: dict) -> bool:
+        """Queue ``query.edit_message_text(text, **kwargs)``.
+
+        ``key`` names the edited message; with ``None`` the call is always
+        made, which suits calls that send a new message. Returns ``False``
+        if the chat's queue is full and the edit was dropped.
+        """
+        try:
+            self._queues[chat_id % len(self._queues)].put_nowait((key, query, text, kwargs))
+        except asyncio.QueueFull:
+            return False
+        if key is not None:
+            self._queued[key] = self._queued.get(key, 0) + 1
+        return True
+
+    def pending(self) -> int:
+        """Number of edits waiting in the queues."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def close(self, timeout: float) -> None:
+        """Deliver queued edits for up to ``timeout`` seconds, then stop."""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Dropping %s undelivered message edits after %ss", self.pending(), timeout
+            )
+        for sender in self._senders:
+            sender.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+        self._senders = []
+
+    def _superseded(self, key: Optional[Hashable]) -> bool:
+        """Whether a newer edit to the same message is queued."""
+        return key is not None and key in self._queued
+
+    async def _sender(self, queue: asyncio.Queue) -> None:
+        """Deliver queued edits in order, honouring flood waits."""
+        while True:
+            key, query, text, kwargs = await queue.get()
+            try:
+                if key is not None:
+                    left = self._queued.pop(key) - 1
+                    if left:
+                        self._queued[key] = left
+                while True:
+                    if self._superseded(key):
+                        logger.debug("Skipping superseded edit to message %s", key)
+                        break
+                    try:
+                        await query.edit_message_text(text, **kwargs)
+                        break
+                    except RetryAfter as e:
+                        logger.warning("Flood control; retrying edit in %ss", e.retry_after)
+                        await asyncio.sleep(e.retry_after)
+            except BadRequest as e:
+                # Usually "message is not modified" after a repeated tap
+                logger.debug("Message edit rejected: %s", e)
+            except Exception:
+                logger.exception("Failed to edit message")
+            finally:
+                queue.task_done()
@@ -1,3 +1,4 @@
+import io
 import os
 import logging
 import tempfile
@@ -17,10 +18,33 @@ logger = logging.getLogger(__name__)
 class StorageService:
     """Service layer for interacting with Supabase storage."""
 
+    __slots__ = ("client",)
+
     def __init__(self, client: Client | None = None):
         # Allow injection of a client for testing; fall back to shared service.
         self.client = client or supabase.client
 
+    @staticmethod
+    def _prepare_image(user_id: int, raw: bytes, file_extension: str) -> Tuple[str, bytes]:
+        """Resize the downloaded photo and write it to a temporary file.
+
+        Returns the temporary file's path and the bytes to upload.
+        """
+        data = raw
+        try:
+            img = Image.open(io.BytesIO(raw))
+            img.thumbnail((1024, 1024))
+            out = io.BytesIO()
+            img.save(out, format=img.format or 'JPEG', optimize=True, quality=85)
+            data = out.getvalue()
+            logger.info("[%s] Image resized and optimized", user_id)
+        except Exception:
+            logger.exception(f"[{user_id}] Could not resize image; keeping original")
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
+            temp_file.write(data)
+        return temp_file.name, data
+
     async def save_photo(self, user_id: int, file: File) -> Tuple[str, str, str]:
         """Save a Telegram photo to Supabase storage.
 
@@ -33,37 +57,27 @@ class StorageService:
         filename = f"uploads/{user_id}/{image_id}.{file_extension}"
 
         logger.info("[%s] Starting photo download...", user_id)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as temp_file:
-            temp_path = temp_file.name
-            try:
-                await file.download_to_drive(temp_path)
-                logger.info("[%s] Photo downloaded to temp: %s", user_id, temp_path)
-            except Exception as download_error:
-                logger.exception(f"[{user_id}] Error downloading photo to {temp_path}")
-                try:
-                    os.unlink(temp_path)
-                except Exception:
-                    logger.warning(f"[{user_id}] Could not delete temp file {temp_path} after download error.")
-                raise
-
         try:
-            img = Image.open(temp_path)
-            img.thumbnail((1024, 1024))
-            img.save(temp_path, optimize=True, quality=85)
-            logger.info("[%s] Image resized and optimized", user_id)
-        except Exception as resize_error:
-            logger.exception(f"[{user_id}] Could not resize image {temp_path}")
+            raw = await file.download_as_bytearray()
+            logger.info("[%s] Photo downloaded (%s bytes)", user_id, len(raw))
+        except Exception:
+            logger.exception(f"[{user_id}] Error downloading photo")
+            raise
+
+        # Decoding, re-encoding and the disk write all block; keep them off the loop
+        temp_path, data = await asyncio.to_thread(
+            self._prepare_image, user_id, bytes(raw), file_extension
+        )
 
         logger.info("[%s] Uploading to Supabase storage...", user_id)
         try:
             bucket = self.client.storage.from_('skin-photos')
-            with open(temp_path, 'rb') as f:
-                response = await asyncio.to_thread(
-                    bucket.upload,
-                    filename,
-                    f,
-                    {"content-type": f"image/{file_extension}"},
-                )
+            response = await asyncio.to_thread(
+                bucket.upload,
+                filename,
+                data,
+                {"content-type": f"image/{file_extension}"},
+            )
             logger.info("[%s] Upload successful: %s", user_id, filename)
             if hasattr(response, 'error') and response.error:
                 logger.error("[%s] Supabase upload error: %s", user_id, response.error)
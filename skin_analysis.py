@@ -201,5 +201,29 @@ def process_skin_image(
     return record
 
 
-__all__ = ["process_skin_image", "align_face", "detect_blemishes"]
+# Face provider for this process, built on first use by run_skin_analysis
+_worker_provider: Optional[FaceAnalysisProvider] = None
+
+
+def run_skin_analysis(image_path: str, user_id: str, image_id: str) -> Optional[Dict[str, object]]:
+    """Process a skin image with this process's own client and provider.
+
+    Entry point for process pools: the Supabase client and face provider
+    cannot be sent to a worker, so each worker builds them once and reuses
+    them for every image it handles.
+    """
+    global _worker_provider
+    if _worker_provider is None and CV2_AVAILABLE:
+        try:
+            from analysis_providers.insightface_provider import InsightFaceProvider
+            _worker_provider = InsightFaceProvider()
+        except ImportError:
+            pass  # process_skin_image falls back to a placeholder
+
+    from services.supabase import supabase
+
+    return process_skin_image(image_path, user_id, image_id, supabase.client, _worker_provider)
+
+
+__all__ = ["process_skin_image", "run_skin_analysis", "align_face", "detect_blemishes"]
 
@@ -18,21 +18,43 @@ Use Cases:
 4. Severity assessment: Track blemish area trends
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta, timezone
-import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Photo KPIs change only when a new photo is analysed; reuse reads briefly
+KPI_CACHE_TTL = 300
+KPI_CACHE_MAX = 1024
+
 class SkinKPIAnalyzer:
     """Analyzes skin health KPIs and provides progress insights."""
+
+    __slots__ = ("db", "_kpis")
     
     def __init__(self, database):
         self.db = database
-    
+        # (telegram_id, days) -> (expires_at, kpi rows)
+        self._kpis: Dict[Tuple[int, int], Tuple[float, List[Dict[str, Any]]]] = {}
+
+    def invalidate(self, telegram_id: int) -> None:
+        """Forget cached KPIs for a user after their photos change."""
+        for key in [k for k in self._kpis if k[0] == telegram_id]:
+            del self._kpis[key]
+
     async def get_user_kpis(self, telegram_id: int, days: int = 30) -> List[Dict[str, Any]]:
-        """Get all skin KPIs for a user in the last N days."""
+        """Get all skin KPIs for a user in the last N days.
+
+        Results are cached for ``KPI_CACHE_TTL`` seconds; callers must not
+        mutate the returned list.
+        """
+        key = (telegram_id, days)
+        cached = self._kpis.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
         try:
             # Get user UUID from telegram_id
             user = await self.db.get_user_by_telegram_id(telegram_id)
@@ -43,7 +65,7 @@ class SkinKPIAnalyzer:
             date_threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
             
             # Query skin KPIs
-            response = await asyncio.to_thread(
+            response = await self.db.run(
                 self.db.client.table('skin_kpis')
                 .select('*')
                 .eq('user_id', user['id'])
@@ -51,12 +73,15 @@ class SkinKPIAnalyzer:
                 .order('timestamp', desc=True)
                 .execute
             )
-            
-            return response.data or []
-            
         except Exception as e:
             logger.error(f"Error getting KPIs for user {telegram_id}: {e}")
             return []
+
+        kpis = response.data or []
+        if len(self._kpis) >= KPI_CACHE_MAX:
+            self._kpis.clear()
+        self._kpis[key] = (time.monotonic() + KPI_CACHE_TTL, kpis)
+        return kpis
     
     async def get_progress_summary(self, telegram_id: int, days: int = 30) -> Dict[str, Any]:
         """Get a progress summary showing improvement trends."""
@@ -65,8 +90,8 @@ class SkinKPIAnalyzer:
         if len(kpis) < 2:
             return {"message": "Need at least 2 photos to show progress"}
         
-        # Sort by timestamp (newest first)
-        kpis.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Sort by timestamp (newest first); the list may be cached, so copy
+        kpis = sorted(kpis, key=lambda x: x['timestamp'], reverse=True)
         
         # Compare latest vs earliest
         latest = kpis[0]
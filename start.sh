@@ -52,8 +52,14 @@ if [ "$missing" -ne 0 ]; then
 fi
 
 log "Starting SkinTracker on port ${PORT:-8080}"
+# One worker: conversation state (context.user_data) and the update and
+# outbound queues live in the bot process, so a second worker would see
+# only part of each user's taps. Scale the handlers within the process.
+# Set PERSISTENCE_FILE to keep that state across graceful restarts.
 exec uvicorn server:app \
+    --workers 1 \
     --host 0.0.0.0 \
     --port "${PORT:-8080}" \
+    --loop uvloop \
     --log-level info \
     --access-log
\ No newline at end of file
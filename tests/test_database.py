@@ -120,3 +120,385 @@ def test_get_users_with_reminders(monkeypatch):
     db = Database()
     users = asyncio.run(db.get_users_with_reminders())
     assert users[0]['telegram_id'] == 1
+
+
+def test_get_user_logs_cached_until_new_log(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.eq.return_value = table
+    table.gte.return_value = table
+    table.order.return_value = table
+    table.insert.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        await db.get_user_logs(1, days=7)
+        await db.get_user_logs(1, days=7)
+        assert table.execute.call_count == 4
+
+        await db.log_symptom(1, 'Redness', 3)
+        await db.get_user_logs(1, days=7)
+        assert table.execute.call_count == 9
+
+    asyncio.run(scenario())
+
+
+def test_log_symptoms_single_insert(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.insert.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}, {'id': 2}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    logged = asyncio.run(db.log_symptoms(1, ['Redness', 'Itching'], 4))
+
+    assert len(logged) == 2
+    assert table.execute.call_count == 1
+    rows = table.insert.call_args[0][0]
+    assert [r['symptom_name'] for r in rows] == ['Redness', 'Itching']
+    assert all(r['severity'] == 4 and r['user_id'] == 10 for r in rows)
+
+
+def test_get_user_by_telegram_id_cached_until_write(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.update.return_value = table
+    table.eq.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 10, 'telegram_id': 1}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def scenario():
+        assert (await db.get_user_by_telegram_id(1))['id'] == 10
+        await db.get_user_by_telegram_id(1)
+        assert table.execute.call_count == 1
+
+        # The update returns the row, which replaces the cached one
+        table.execute.return_value = MagicMock(data=[{'id': 10, 'telegram_id': 1, 'reminder_time': '18:00'}])
+        await db.update_user_reminder(1, '18:00')
+        assert (await db.get_user_by_telegram_id(1))['reminder_time'] == '18:00'
+        assert table.execute.call_count == 2
+
+    asyncio.run(scenario())
+
+
+def test_get_products_cached_until_product_added(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.or_.return_value = table
+    table.insert.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1, 'name': 'Cream'}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        assert (await db.get_products(1))[0]['name'] == 'Cream'
+        await db.get_products(1)
+        assert table.execute.call_count == 1
+
+        await db.add_product(1, 'Serum')
+        await db.get_products(1)
+        assert table.execute.call_count == 3
+
+    asyncio.run(scenario())
+
+
+def test_create_user_areas_single_insert(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.insert.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}, {'id': 2}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    saved = asyncio.run(db.create_user_areas(1, ['Forehead', 'Chin']))
+
+    assert saved == 2
+    assert table.execute.call_count == 1
+    rows = table.insert.call_args[0][0]
+    assert [r['name'] for r in rows] == ['Forehead', 'Chin']
+
+
+def test_get_today_logs_cached_until_new_log(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.insert.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}])
+    supabase_client.table.return_value = table
+    supabase_client.rpc.return_value.execute.return_value = MagicMock(data=[{
+        'photo_count': 1, 'mood_count': 0, 'symptom_count': 2, 'product_count': 0
+    }])
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        counts = await db.get_today_logs(1)
+        await db.get_today_logs(1)
+        assert counts == {'photo_count': 1, 'mood_count': 0, 'symptom_count': 2, 'product_count': 0}
+        assert supabase_client.rpc.call_count == 1
+
+        await db.log_daily_mood(1, 4, 'Good')
+        await db.get_today_logs(1)
+        assert supabase_client.rpc.call_count == 2
+        assert table.execute.call_count == 1
+
+    asyncio.run(scenario())
+
+
+def test_get_today_logs_falls_back_to_per_table_counts(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.eq.return_value = table
+    table.gte.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}], count=1)
+    supabase_client.table.return_value = table
+    supabase_client.rpc.side_effect = Exception("function not found")
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    counts = asyncio.run(db.get_today_logs(1))
+
+    assert counts == {'photo_count': 1, 'mood_count': 1, 'symptom_count': 1, 'product_count': 1}
+    assert table.execute.call_count == 4
+
+
+def test_get_today_logs_keeps_rpc_after_transient_error(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.eq.return_value = table
+    table.gte.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}], count=1)
+    supabase_client.table.return_value = table
+    rows = MagicMock(data=[{
+        'photo_count': 2, 'mood_count': 0, 'symptom_count': 0, 'product_count': 0
+    }])
+    missing = Exception("Could not find the function")
+    missing.code = 'PGRST202'
+    supabase_client.rpc.return_value.execute.side_effect = [TimeoutError("timed out"), rows, missing]
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        assert (await db.get_today_logs(1))['photo_count'] == 1
+        db._invalidate_user_logs(1)
+        assert (await db.get_today_logs(1))['photo_count'] == 2
+        db._invalidate_user_logs(1)
+        await db.get_today_logs(1)
+        db._invalidate_user_logs(1)
+        await db.get_today_logs(1)
+        assert supabase_client.rpc.call_count == 3
+        assert table.execute.call_count == 12
+
+    asyncio.run(scenario())
+
+
+def test_add_and_log_product_falls_back_when_function_missing(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.insert.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}])
+    supabase_client.table.return_value = table
+    missing = Exception("Could not find the function")
+    missing.code = 'PGRST202'
+    supabase_client.rpc.return_value.execute.side_effect = [None, missing]
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        await db.add_and_log_product(1, 'Serum')
+        supabase_client.rpc.assert_called_with('add_and_log_product', {'p_user_id': 10, 'p_name': 'Serum'})
+        assert table.execute.call_count == 0
+
+        await db.add_and_log_product(1, 'Toner')
+        await db.add_and_log_product(1, 'Balm')
+        assert supabase_client.rpc.call_count == 2
+        assert table.execute.call_count == 4
+
+    asyncio.run(scenario())
+
+
+def test_get_user_logs_skips_cache_when_invalidated_mid_fetch(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.eq.return_value = table
+    table.gte.return_value = table
+    table.order.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        # A log written while the fetch is in flight
+        db._invalidate_user_logs(tid)
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        await db.get_user_logs(1, days=7)
+        await db.get_user_logs(1, days=7)
+        assert table.execute.call_count == 8
+
+    asyncio.run(scenario())
+
+
+def test_get_user_logs_returns_copy_of_cache(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.eq.return_value = table
+    table.gte.return_value = table
+    table.order.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    async def scenario():
+        logs = await db.get_user_logs(1, days=7)
+        logs['products'].append({'id': 2})
+        logs['photos'] = []
+        cached = await db.get_user_logs(1, days=7)
+        assert cached['products'] == [{'id': 1}]
+        assert cached['photos'] == [{'id': 1}]
+        assert table.execute.call_count == 4
+
+    asyncio.run(scenario())
+
+
+def test_add_and_log_trigger_fallback_skips_log_when_add_fails(monkeypatch):
+    supabase_client = MagicMock()
+    missing = Exception("Could not find the function")
+    missing.code = 'PGRST202'
+    supabase_client.rpc.return_value.execute.side_effect = missing
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_id(tid):
+        return 10
+
+    calls = []
+
+    async def failing_add_trigger(tid, name):
+        calls.append('add')
+        raise RuntimeError("insert failed")
+
+    async def fake_log_trigger(tid, name):
+        calls.append('log')
+
+    monkeypatch.setattr(db, '_get_user_id', fake_get_user_id)
+    monkeypatch.setattr(db, 'add_trigger', failing_add_trigger)
+    monkeypatch.setattr(db, 'log_trigger', fake_log_trigger)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(db.add_and_log_trigger(1, 'Pollen'))
+    assert calls == ['add']
+
+
+def test_delete_all_user_data_drops_logs_cached_during_delete(monkeypatch):
+    supabase_client = MagicMock()
+    table = MagicMock()
+    table.select.return_value = table
+    table.eq.return_value = table
+    table.gte.return_value = table
+    table.order.return_value = table
+    table.delete.return_value = table
+    table.execute.return_value = MagicMock(data=[{'id': 1}])
+    supabase_client.table.return_value = table
+
+    db = Database()
+    monkeypatch.setattr(db, 'client', supabase_client)
+
+    async def fake_get_user_by_telegram_id(tid):
+        return {'id': 10, 'telegram_id': tid}
+
+    monkeypatch.setattr(db, 'get_user_by_telegram_id', fake_get_user_by_telegram_id)
+
+    real_run = db.run
+
+    async def run_with_read_during_delete(func, *args):
+        result = await real_run(func, *args)
+        if func is table.execute and table.delete.called and not db._logs_cache:
+            # A /summary that lands while the delete is in flight
+            await db.get_user_logs(1, days=7)
+        return result
+
+    monkeypatch.setattr(db, 'run', run_with_read_during_delete)
+
+    async def scenario():
+        await db.delete_all_user_data(1, ['photos'])
+        assert db._logs_cache == {}
+
+    asyncio.run(scenario())
@@ -0,0 +1,146 @@
+import asyncio
+import sys
+import time
+import types
+
+# Stub telegram.error when the telegram package itself is stubbed
+class _RetryAfter(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Retry in {retry_after}")
+        self.retry_after = retry_after
+
+
+class _BadRequest(Exception):
+    pass
+
+
+sys.modules.setdefault(
+    "telegram.error", types.SimpleNamespace(RetryAfter=_RetryAfter, BadRequest=_BadRequest)
+)
+
+from services import message_queue
+from services.message_queue import EditOutbox
+
+
+class FakeQuery:
+    """Records edits; ``fail`` maps a text to the exceptions raised for it in turn."""
+
+    def __init__(self, sent, fail=None):
+        self.sent = sent
+        self.fail = fail or {}
+
+    async def edit_message_text(self, text, **kwargs):
+        errors = self.fail.get(text)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(text)
+
+
+def test_edits_to_one_chat_arrive_in_order():
+    sent = []
+    query = FakeQuery(sent)
+
+    async def scenario():
+        outbox = EditOutbox(shards=2, maxsize=100)
+        for i in range(5):
+            assert outbox.put(7, (7, i), query, f"edit {i}", {})
+        outbox.put(7, None, query, "reply", {})
+        outbox.start()
+        await outbox.close(timeout=1)
+
+    asyncio.run(scenario())
+    assert sent == ["edit 0", "edit 1", "edit 2", "edit 3", "edit 4", "reply"]
+
+
+def test_superseded_edits_to_a_message_are_skipped():
+    sent = []
+    query = FakeQuery(sent)
+
+    async def scenario():
+        outbox = EditOutbox(shards=1, maxsize=100)
+        outbox.put(7, (7, 1), query, "keyboard a", {})
+        outbox.put(7, (7, 2), query, "other message", {})
+        outbox.put(7, (7, 1), query, "keyboard b", {})
+        outbox.put(7, (7, 1), query, "logged", {})
+        outbox.start()
+        await outbox.close(timeout=1)
+
+    asyncio.run(scenario())
+    assert sent == ["other message", "logged"]
+
+
+def test_flood_wait_retries_then_delivers():
+    sent = []
+    query = FakeQuery(sent, {"keyboard": [message_queue.RetryAfter(0)]})
+
+    async def scenario():
+        outbox = EditOutbox(shards=1, maxsize=100)
+        outbox.put(7, (7, 1), query, "keyboard", {})
+        outbox.start()
+        await outbox.close(timeout=1)
+
+    asyncio.run(scenario())
+    assert sent == ["keyboard"]
+
+
+def test_edit_queued_during_flood_wait_replaces_the_waiting_one():
+    sent = []
+
+    async def scenario():
+        outbox = EditOutbox(shards=1, maxsize=100)
+        final = FakeQuery(sent)
+
+        class WaitingQuery(FakeQuery):
+            async def edit_message_text(self, text, **kwargs):
+                # The final screen is queued while this edit waits out the flood limit
+                outbox.put(7, (7, 1), final, "logged", {})
+                raise message_queue.RetryAfter(0)
+
+        outbox.put(7, (7, 1), WaitingQuery(sent), "keyboard", {})
+        outbox.start()
+        await outbox.close(timeout=1)
+
+    asyncio.run(scenario())
+    assert sent == ["logged"]
+
+
+def test_rejected_edit_does_not_stop_the_sender():
+    sent = []
+    query = FakeQuery(sent, {"same": [message_queue.BadRequest("Message is not modified")]})
+
+    async def scenario():
+        outbox = EditOutbox(shards=1, maxsize=100)
+        outbox.put(7, (7, 1), query, "same", {})
+        outbox.put(7, (7, 2), query, "next", {})
+        outbox.start()
+        await outbox.close(timeout=1)
+
+    asyncio.run(scenario())
+    assert sent == ["next"]
+
+
+def test_full_queue_drops_edit():
+    async def scenario():
+        outbox = EditOutbox(shards=1, maxsize=1)
+        query = FakeQuery([])
+        assert outbox.put(7, (7, 1), query, "first", {})
+        assert not outbox.put(7, (7, 1), query, "second", {})
+        assert outbox.pending() == 1
+
+    asyncio.run(scenario())
+
+
+def test_close_gives_up_after_timeout():
+    class HangingQuery:
+        async def edit_message_text(self, text, **kwargs):
+            await asyncio.sleep(60)
+
+    async def scenario():
+        outbox = EditOutbox(shards=1, maxsize=10)
+        outbox.put(7, (7, 1), HangingQuery(), "stuck", {})
+        outbox.start()
+        started = time.monotonic()
+        await outbox.close(timeout=0.05)
+        assert time.monotonic() - started < 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,21 @@
+from utils.notes import parse_note
+
+
+def test_parse_note_without_note():
+    assert parse_note("Sun exposure") == ("Sun exposure", None)
+
+
+def test_parse_note_with_note():
+    assert parse_note('Spicy food note:"Thai restaurant"') == ("Spicy food", "Thai restaurant")
+
+
+def test_parse_note_keeps_quotes_inside_note():
+    assert parse_note('Dairy note:"he said "hi""') == ("Dairy", 'he said "hi"')
+
+
+def test_parse_note_without_closing_quote():
+    assert parse_note('Stress note:"work deadline') == ("Stress", "work deadline")
+
+
+def test_parse_note_only_note_has_empty_name():
+    assert parse_note('note:"x"') == ("", "x")
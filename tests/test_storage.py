@@ -45,12 +45,9 @@ from services.storage import StorageService
 class FakeFile:
     def __init__(self, file_path="photo.jpg"):
         self.file_path = file_path
-        self.downloaded_path = None
 
-    async def download_to_drive(self, path):
-        self.downloaded_path = path
-        img = _new_stub("RGB", (10, 10), color="white")
-        img.save(path)
+    async def download_as_bytearray(self):
+        return bytearray(b"data")
 
 
 class FakeBucket:
@@ -79,7 +76,8 @@ def test_temp_file_retained_until_cleanup():
     public_url, temp_path, image_id = asyncio.run(service.save_photo(123, file))
 
     assert public_url == f"https://example.com/uploads/123/{image_id}.jpg"
-    assert temp_path == file.downloaded_path
-    assert os.path.exists(temp_path)
+    assert temp_path.endswith(".jpg")
+    with open(temp_path, "rb") as f:
+        assert f.read() == b"data"
     os.unlink(temp_path)
     assert not os.path.exists(temp_path)
@@ -0,0 +1,29 @@
+-- Today's Log Counts Migration
+-- Add this to Supabase SQL Editor so the daily check-in reads all four
+-- counts in one round-trip instead of one query per table.
+
+CREATE OR REPLACE FUNCTION public.get_today_log_counts(
+  p_user_id  uuid,
+  p_since    timestamptz
+)
+RETURNS TABLE (
+  photo_count   integer,
+  mood_count    integer,
+  symptom_count integer,
+  product_count integer
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    (SELECT COUNT(*)::int FROM public.photo_logs      WHERE user_id = p_user_id AND logged_at >= p_since),
+    (SELECT COUNT(*)::int FROM public.daily_mood_logs WHERE user_id = p_user_id AND logged_at >= p_since),
+    (SELECT COUNT(*)::int FROM public.symptom_logs    WHERE user_id = p_user_id AND logged_at >= p_since),
+    (SELECT COUNT(*)::int FROM public.product_logs    WHERE user_id = p_user_id AND logged_at >= p_since);
+$$;
+
+-- Each count above is a range scan on (user_id, logged_at)
+CREATE INDEX IF NOT EXISTS idx_photo_logs_user_logged_at      ON photo_logs(user_id, logged_at);
+CREATE INDEX IF NOT EXISTS idx_daily_mood_logs_user_logged_at ON daily_mood_logs(user_id, logged_at);
+CREATE INDEX IF NOT EXISTS idx_symptom_logs_user_logged_at    ON symptom_logs(user_id, logged_at);
+CREATE INDEX IF NOT EXISTS idx_product_logs_user_logged_at    ON product_logs(user_id, logged_at);
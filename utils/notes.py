@@ -0,0 +1,12 @@
+import re
+from typing import Optional, Tuple
+
+# "<name> note:\"<note>\"" as typed after a quick-log command. The note runs to
+# the end of the input, so it may contain quotes; the closing quote is optional.
+_NOTE_RE = re.compile(r'^(?P<name>.*?)(?:(?:^|\s+)note:"(?P<note>.*?)"?)?\s*$', re.DOTALL)
+
+
+def parse_note(text: str) -> Tuple[str, Optional[str]]:
+    """Split quick-log input into its stripped name and optional note."""
+    match = _NOTE_RE.match(text)
+    return match["name"].strip(), match["note"]